@@ -0,0 +1,161 @@
+import argparse
+import ast
+import json
+import sys
+from contextlib import nullcontext, redirect_stdout
+from dataclasses import asdict
+
+from solvers.registry import registry, run_solver
+
+# Giải một bản đồ không cần giao diện (không import pygame); module của bộ giải
+# chỉ được import khi thuật toán đó được chọn (xem solvers.registry).
+#   python cli.py --size 5 --map 1 --algorithm A*
+#   python cli.py --puzzle puzzle.txt --algorithm SAT --timeout 10 --json
+# Tệp puzzle: mỗi dòng là một hàng của lưới, "." là ô trống, mỗi màu là một ký
+# tự xuất hiện đúng hai lần (ô đầu và ô đích).
+
+directions = {
+    "up": (-1, 0),
+    "down": (1, 0),
+    "left": (0, -1),
+    "right": (0, 1),
+}  # Hướng di chuyển trong ma trận
+
+
+# Đọc bản đồ từ tệp văn bản; trả về (start_goals, ROWS, COLS)
+def load_puzzle(path):
+    with open(path) as f:
+        rows = [line.strip() for line in f if line.strip()]
+    if not rows or any(len(row) != len(rows[0]) for row in rows):
+        raise ValueError(f"Puzzle grid must be a non-empty rectangle: {path!r}")
+
+    cells = {}  # Màu -> các ô mang màu đó
+    for r, row in enumerate(rows):
+        for c, ch in enumerate(row):
+            if ch != ".":
+                cells.setdefault(ch, []).append((r, c))
+    if not cells:
+        raise ValueError("Puzzle must contain at least one color")
+    for color, positions in cells.items():
+        if len(positions) != 2:
+            raise ValueError(f"Color {color!r} must appear exactly twice")
+    start_goals = {color: tuple(positions) for color, positions in cells.items()}
+    return start_goals, len(rows), len(rows[0])
+
+
+# Tùy chọn của bộ giải dạng key=value, value đọc theo cú pháp Python nếu được
+def parse_option(text):
+    key, sep, value = text.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected key=value, got {text!r}")
+    try:
+        return key, ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return key, value
+
+
+# Vẽ lời giải thành lưới ký tự (mỗi ô mang ký tự màu của đường đi qua nó)
+def render(start_goals, ROWS, COLS, moves):
+    grid = [["." for _ in range(COLS)] for _ in range(ROWS)]
+    heads = {}
+    for color, (start, goal) in start_goals.items():
+        grid[start[0]][start[1]] = grid[goal[0]][goal[1]] = color
+        heads[color] = start
+    for color, move in moves:
+        r, c = heads[color]
+        dr, dc = directions[move]
+        heads[color] = (r + dr, c + dc)
+        grid[r + dr][c + dc] = color
+    return "\n".join("".join(row) for row in grid)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Flow Free solver (headless, no pygame)"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--puzzle", help="text file with the puzzle grid")
+    source.add_argument("--size", default="5", help="map size in map_data")
+    parser.add_argument("--map", type=int, default=1, help="map number in map_data")
+    parser.add_argument("--algorithm", default="A*", choices=list(registry))
+    parser.add_argument("--timeout", type=float, help="time limit in seconds")
+    parser.add_argument(
+        "-o",
+        "--option",
+        action="append",
+        type=parse_option,
+        default=[],
+        metavar="KEY=VALUE",
+        help="extra solver argument, e.g. -o workers=2 (repeatable)",
+    )
+    parser.add_argument(
+        "--memory", action="store_true", help="measure peak memory (slower)"
+    )
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.puzzle:
+        try:
+            start_goals, ROWS, COLS = load_puzzle(args.puzzle)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    else:
+        from map_data import maps
+
+        if args.map not in maps.get(args.size, {}):
+            parser.error(f"Unknown map: size {args.size}, map {args.map}")
+        start_goals = maps[args.size][args.map]
+        ROWS = COLS = int(args.size)
+
+    # Với --json, thông báo của bộ giải được chuyển sang stderr để stdout chỉ
+    # chứa đúng một dòng JSON
+    # Tham số -o sai (ValueError, TypeError) là lỗi dùng lệnh; lỗi khi chạy bộ
+    # giải được run_solver trả về với status "error"
+    try:
+        with redirect_stdout(sys.stderr) if args.json else nullcontext():
+            result = run_solver(
+                args.algorithm,
+                start_goals,
+                ROWS,
+                COLS,
+                timeout=args.timeout,
+                measure_memory=args.memory,
+                **dict(args.option),
+            )
+    except (TypeError, ValueError) as e:
+        parser.error(str(e))
+
+    if args.json:
+        output = {"algorithm": args.algorithm, "rows": ROWS, "cols": COLS}
+        output.update(asdict(result))
+        print(json.dumps(output))
+    else:
+        print(f"Algorithm: {args.algorithm} ({ROWS}x{COLS})")
+        print(f"Status: {result.status}")
+        if result.error is not None:
+            print(f"Error: {result.error}")
+        print(f"Time taken: {result.elapsed:.4f} seconds")
+        if result.solved:
+            print(f"Number of steps to goal: {len(result.moves)}")
+        if result.nodes_generated is not None:
+            print(f"Nodes generated: {result.nodes_generated}")
+        if result.nodes_expanded is not None:
+            print(f"Nodes expanded: {result.nodes_expanded}")
+        if result.max_depth is not None:
+            print(f"Maximum depth reached: {result.max_depth}")
+        if result.peak_memory is not None:
+            print(f"Peak memory: {result.peak_memory} bytes")
+        if result.stats:
+            print(f"Solver stats: {result.stats}")
+        if result.solved:
+            print(render(start_goals, ROWS, COLS, result.moves))
+    return 0 if result.solved else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
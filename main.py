@@ -4,10 +4,7 @@ import time
 import threading
 from select_map import select_map
 from map_data import maps
-from solvers.astar_solver import solve_astar
-from solvers.bfs_solver import solve_bfs
-from solvers.csp_solver import solve_csp
-from solvers.sa_solver import solve_sa
+from solvers.registry import CancelToken, registry, run_solver
 
 # ==== Select Map + Settings ====
 size, map_number, algorithm = select_map()
@@ -26,6 +23,7 @@ pygame.display.set_caption("Flow Free Solver")
 # ==== Global ====
 solving_done = False  # Dùng để theo dõi trạng thái giải thuật
 path = None  # Dùng để lưu đường đi của giải thuật
+cancel = CancelToken()  # Báo giải thuật dừng khi đóng cửa sổ
 
 directions = {
     "up": (-1, 0),
@@ -157,35 +155,33 @@ def draw_no_solution_text():
 def solver_thread_fn():
     global path, solving_done  # Để theo dõi trạng thái giải thuật
 
-    result = None  # Kết quả trả về từ giải thuật
-    if algorithm == "A*":
-        result = solve_astar(start_goals, ROWS, COLS)
-    elif algorithm == "BFS":
-        result = solve_bfs(start_goals, ROWS, COLS)
-    elif algorithm == "CSP":
-        result = solve_csp(start_goals, ROWS, COLS)
-    elif algorithm == "SA":
-        result = solve_sa(start_goals, ROWS, COLS)
-
-    if result:
-        path, time_used, nodes_generated, nodes_expanded, max_depth = result
-        if path:
-            print(f"Solved using algorithm: {algorithm}")
-            print(f"Number of steps to goal: {len(path)}")
-            print(f"Time taken: {time_used:.4f} seconds")
-            if nodes_generated is not None:
-                print(f"Nodes generated: {nodes_generated}")
-            if nodes_expanded is not None:
-                print(f"Nodes expanded: {nodes_expanded}")
-            if max_depth is not None:
-                print(f"Maximum depth reached: {max_depth}")
-        else:
-            print(f"Nodes generated: {nodes_generated}")
-            print(f"Nodes expanded: {nodes_expanded}")
-            print(f"Maximum depth reached: {max_depth}")
-            print(f"{algorithm}: Không tìm thấy lời giải.")
-    else:
+    if algorithm not in registry:
         print(f"{algorithm}: Solver chưa được triển khai.")
+        solving_done = True
+        return
+
+    result = run_solver(algorithm, start_goals, ROWS, COLS, cancel=cancel)
+
+    if result.solved:
+        path = result.moves
+        print(f"Solved using algorithm: {algorithm}")
+        print(f"Number of steps to goal: {len(path)}")
+        print(f"Time taken: {result.elapsed:.4f} seconds")
+        if result.nodes_generated is not None:
+            print(f"Nodes generated: {result.nodes_generated}")
+        if result.nodes_expanded is not None:
+            print(f"Nodes expanded: {result.nodes_expanded}")
+        if result.max_depth is not None:
+            print(f"Maximum depth reached: {result.max_depth}")
+    elif result.status == "cancelled":
+        print(f"{algorithm}: Đã dừng giải thuật.")
+    else:
+        print(f"Nodes generated: {result.nodes_generated}")
+        print(f"Nodes expanded: {result.nodes_expanded}")
+        print(f"Maximum depth reached: {result.max_depth}")
+        print(f"{algorithm}: Không tìm thấy lời giải.")
+    if result.stats:
+        print(f"Solver stats: {result.stats}")
 
     solving_done = True
 
@@ -223,4 +219,6 @@ while running:
     pygame.display.update()
     clock.tick(60)
 
+cancel.cancel()  # Cửa sổ đã đóng: không cần kết quả nữa, giải phóng CPU
+solver_thread.join()
 pygame.quit()
@@ -66,6 +66,8 @@ menu.add.selector(
         ("BFS", "BFS"),
         ("CSP", "CSP"),
         ("SA", "SA"),
+        ("Beam", "Beam"),
+        ("SAT", "SAT"),
     ],
     onchange=set_algorithm,
 )
@@ -2,6 +2,10 @@ import copy
 import heapq
 import time
 
+from solvers.bitboard import BitBoard
+from solvers.regions import find_forced_move, is_dead_state
+from solvers.zobrist import TranspositionTable, ZobristHasher
+
 directions = {
     "up": (-1, 0),
     "down": (1, 0),
@@ -18,18 +22,13 @@ class Node:
         self.move = move  # Di chuyển từ node cha đến node này
         self.cost = cost  # Chi phí từ node cha đến node này
         self.f = 0  # Tổng chi phí (g + h)
+        self.key = None  # Khóa Zobrist của trạng thái
+        self.forced = []  # Các nước đi bắt buộc áp dụng ngay sau move
 
     def __lt__(self, other):  # So sánh hai node dựa trên chi phí f
         return self.f < other.f
 
 
-# Mã hóa trạng thái của ma trận và luồng màu
-def encode_state(matrix, flows):
-    m_str = "".join(cell if cell else "." for row in matrix for cell in row)
-    f_str = "".join(f"{c}{r}{col}" for c, (r, col) in sorted(flows.items()))
-    return m_str + f_str
-
-
 # Kiểm tra xem node hiện tại có phải là trạng thái mục tiêu không?
 def is_goal(node):
     return all(cell is not None for row in node.matrix for cell in row)
@@ -59,34 +58,46 @@ def move_flow(matrix, flows, color, direction):
     return new_matrix, new_flows
 
 
-# Kiểm tra tồn tại đường đi từ start đến goal
-def path_exists(matrix, start, goal, color, ROWS, COLS):
-    queue = [start]
-    visited = set()
-    while queue:
-        r, c = queue.pop()
-        if (r, c) == goal:
-            return True
-        visited.add((r, c))
-        for dr, dc in directions.values():
-            nr, nc = r + dr, c + dc
-            if 0 <= nr < ROWS and 0 <= nc < COLS:
-                if (matrix[nr][nc] is None or (nr, nc) == goal) and (
-                    nr,
-                    nc,
-                ) not in visited:
-                    queue.append((nr, nc))
-    return False
+# Phát hiện xem có bị mắc kẹt không? Một lần loang duy nhất kiểm tra đồng thời
+# đường tới đích của từng luồng, vùng trống bị cô lập và ô ngõ cụt
+def detect_dead_end(node, start_goals, ROWS, COLS):
+    goals = {color: goal for color, (_, goal) in start_goals.items()}
+    return is_dead_state(node.matrix, node.flows, goals, ROWS, COLS)
+
+
+# Tính khóa Zobrist sau khi luồng color của node đi vào ô target
+def move_key(hasher, node, color, target):
+    return hasher.move(
+        node.key,
+        hasher.color_index[color],
+        hasher.index(node.flows[color]),
+        hasher.index(target),
+        fill=node.matrix[target[0]][target[1]] is None,
+    )
 
 
-# Phát hiện xem có bị mắc kẹt không?
-def detect_dead_end(node, start_goals, ROWS, COLS):
-    for color in start_goals:
-        r, c = node.flows[color]
-        goal_r, goal_c = start_goals[color][1]
-        if not path_exists(node.matrix, (r, c), (goal_r, goal_c), color, ROWS, COLS):
-            return True
-    return False
+# Áp dụng tại chỗ nước đi lên node (node phải sở hữu riêng matrix và flows)
+def apply_move(node, color, direction, hasher=None):
+    r, c = node.flows[color]
+    dr, dc = directions[direction]
+    nr, nc = r + dr, c + dc
+    if hasher is not None:
+        node.key = move_key(hasher, node, color, (nr, nc))
+    node.matrix[nr][nc] = color
+    node.flows[color] = (nr, nc)
+
+
+# Áp dụng liên tiếp các nước đi bắt buộc cho đến khi không còn, gộp chúng
+# vào cạnh dẫn tới node để không tốn một lần mở rộng cho mỗi nước
+def propagate_forced(node, start_goals, ROWS, COLS, hasher=None):
+    goals = {color: goal for color, (_, goal) in start_goals.items()}
+    while True:
+        move = find_forced_move(node.matrix, node.flows, goals, ROWS, COLS)
+        if move is None:
+            return
+        apply_move(node, *move, hasher=hasher)
+        node.forced.append(move)
+        node.cost += 1
 
 
 # Đếm số hướng có thể đi cho một luồng
@@ -114,7 +125,7 @@ def choose_flow(node, start_goals, ROWS, COLS):
 
 
 # Hàm này dùng để tạo ra các node con từ node hiện tại
-def generate_successors(node, start_goals, ROWS, COLS):
+def generate_successors(node, start_goals, ROWS, COLS, hasher=None, propagate=True):
     successors = []
     color = choose_flow(node, start_goals, ROWS, COLS)
     if color is None:
@@ -129,6 +140,10 @@ def generate_successors(node, start_goals, ROWS, COLS):
                 move=(color, direction),
                 cost=node.cost + 1,
             )
+            if hasher is not None:
+                child.key = move_key(hasher, node, color, new_flows[color])
+            if propagate:
+                propagate_forced(child, start_goals, ROWS, COLS, hasher)
             if not detect_dead_end(child, start_goals, ROWS, COLS):
                 successors.append(child)
     return successors
@@ -146,29 +161,225 @@ def heuristic(node, start_goals):
 # Hàm này dùng để lấy đường đi từ node hiện tại về node gốc
 def reconstruct_path(node):
     path = []
-    while node.parent:
-        path.append(node.move)
+    while node:
+        path.extend(reversed(node.forced))
+        if node.move:
+            path.append(node.move)
         node = node.parent
     path.reverse()
     return path
 
 
+# Bộ máy trạng thái mặc định: ma trận lồng nhau và từ điển vị trí luồng màu
+class MatrixBoard:
+    def __init__(self, start_goals, ROWS, COLS, propagate=True):
+        self.start_goals = start_goals
+        self.ROWS = ROWS
+        self.COLS = COLS
+        self.propagate = propagate  # Có lan truyền nước đi bắt buộc hay không
+        self.hasher = ZobristHasher(list(start_goals), ROWS, COLS)
+
+    def initial_node(self):
+        matrix = [[None for _ in range(self.COLS)] for _ in range(self.ROWS)]
+        flows = {}  # Vị trí hiện tại của từng luồng màu
+        for color, (start, _) in self.start_goals.items():
+            r, c = start
+            matrix[r][c] = color
+            flows[color] = (r, c)
+        node = Node(matrix, flows)
+        node.key = self.hasher.hash_state(matrix, flows)
+        if self.propagate:
+            propagate_forced(
+                node, self.start_goals, self.ROWS, self.COLS, self.hasher
+            )
+        return node
+
+    # Khóa Zobrist được cập nhật tăng dần theo nước đi thay vì dựng chuỗi
+    def encode_state(self, node):
+        return node.key
+
+    def is_goal(self, node):
+        return is_goal(node)
+
+    def generate_successors(self, node):
+        return generate_successors(
+            node,
+            self.start_goals,
+            self.ROWS,
+            self.COLS,
+            hasher=self.hasher,
+            propagate=self.propagate,
+        )
+
+    def heuristic(self, node):
+        return heuristic(node, self.start_goals)
+
+    def empty_cells(self, node):
+        return sum(1 for row in node.matrix for cell in row if cell is None)
+
+
+engines = {
+    "matrix": MatrixBoard,
+    "bitboard": BitBoard,
+}  # Các bộ máy biểu diễn trạng thái có thể chọn cho A*
+
+
+# Tạo bộ máy trạng thái theo tên
+def make_board(engine, start_goals, ROWS, COLS, propagate=True):
+    if engine not in engines:
+        raise ValueError(f"Unknown A* engine: {engine!r}")
+    return engines[engine](start_goals, ROWS, COLS, propagate=propagate)
+
+
+# IDA*: tìm kiếm sâu dần theo ngưỡng f = g + h. Chỉ giữ nhánh đang duyệt
+# (và các anh em của nó) trong bộ nhớ nên bộ nhớ không tăng theo số node sinh ra.
+# tt_capacity: kích thước bảng chuyển vị cố định dùng để cắt trạng thái trùng
+# trong mỗi vòng lặp (None để không dùng bảng).
+# cancel: cờ dừng hợp tác (xem registry.CancelToken), kiểm tra ở mỗi node.
+def solve_idastar(
+    start_goals,
+    ROWS,
+    COLS,
+    engine="matrix",
+    tt_capacity=None,
+    propagate=True,
+    cancel=None,
+):
+    board = make_board(engine, start_goals, ROWS, COLS, propagate=propagate)
+    start_node = board.initial_node()  # Khởi tạo node bắt đầu
+    start_node.f = start_node.cost + board.heuristic(start_node)
+    bound = start_node.f  # Ngưỡng f của vòng lặp đầu tiên
+
+    # Khởi tạo các biến đếm
+    nodes_generated = 0
+    nodes_expanded = 0
+    max_depth = 0
+    start_time = time.time()
+
+    while True:
+        next_bound = float("inf")  # Giá trị f nhỏ nhất vượt ngưỡng hiện tại
+        state_cost = None
+        if tt_capacity is not None:
+            state_cost = TranspositionTable(tt_capacity, replace="depth")
+
+        # Ngăn xếp các bộ lặp node con, thay cho đệ quy
+        stack = [iter([start_node])]
+        while stack:
+            if cancel is not None and cancel.is_set():
+                return None, None, nodes_generated, nodes_expanded, max_depth
+            current = next(stack[-1], None)
+            if current is None:
+                stack.pop()
+                continue
+
+            # Vượt ngưỡng: ghi nhận ngưỡng cho vòng lặp sau
+            if current.f > bound:
+                next_bound = min(next_bound, current.f)
+                continue
+
+            nodes_expanded += 1
+            max_depth = max(max_depth, current.cost)
+
+            # Kiểm tra đã đến đích chưa?
+            if board.is_goal(current):
+                end_time = time.time()
+                return (
+                    reconstruct_path(current),
+                    end_time - start_time,
+                    nodes_generated,
+                    nodes_expanded,
+                    max_depth,
+                )
+
+            # Bỏ qua trạng thái đã duyệt với chi phí không lớn hơn trong vòng này
+            if state_cost is not None:
+                current_state = board.encode_state(current)
+                known_cost = state_cost.get(current_state)
+                if known_cost is not None and known_cost <= current.cost:
+                    continue
+                state_cost.store(current_state, current.cost)
+
+            # Sinh node con, duyệt node có f nhỏ trước
+            children = board.generate_successors(current)
+            nodes_generated += len(children)
+            for child in children:
+                child.f = child.cost + board.heuristic(child)
+            children.sort(key=lambda child: child.f)
+            stack.append(iter(children))
+
+        # Không còn node nào vượt ngưỡng: không có lời giải
+        if next_bound == float("inf"):
+            return None, None, nodes_generated, nodes_expanded, max_depth
+        bound = next_bound
+
+
+search_modes = {
+    "astar": (1, 1),  # f = g + h
+    "weighted": (1, None),  # f = g + weight * h
+    "greedy": (0, 1),  # f = h (best-first tham lam)
+    "ida": None,  # IDA* giới hạn bộ nhớ
+}  # Hệ số (g, h) của các chế độ tìm kiếm trong solve_astar
+
+
 # Giải thuật chính A*
-def solve_astar(start_goals, ROWS, COLS):
-    matrix = [[None for _ in range(COLS)] for _ in range(ROWS)]  # Ma trận ban đầu
-    flows = {}  # Vị trí hiện tại của từng luồng màu
-    # Khởi tạo ma trận và vị trí luồng màu
-    for color, (start, _) in start_goals.items():
-        r, c = start
-        matrix[r][c] = color
-        flows[color] = (r, c)
-
-    start_node = Node(matrix, flows)  # Khởi tạo node bắt đầu
+# Mọi lời giải đều phủ kín lưới nên có cùng số bước, vì vậy g không giúp phân biệt
+# lời giải tốt hơn; mode="greedy" bỏ g, mode="weighted" nhân h với weight.
+# tie_break=True: khi f bằng nhau ưu tiên node còn ít ô trống hơn.
+# mode="ida" chuyển sang IDA* giới hạn bộ nhớ (xem solve_idastar).
+# workers khác 1 (None = số CPU): HDA* trên nhiều tiến trình (xem
+# parallel_astar.solve_parallel_astar), chỉ dùng với mode="astar".
+# cancel: cờ dừng hợp tác (xem registry.CancelToken), kiểm tra ở mỗi node.
+def solve_astar(
+    start_goals,
+    ROWS,
+    COLS,
+    engine="matrix",
+    tt_capacity=None,
+    propagate=True,
+    mode="astar",
+    weight=2.0,
+    tie_break=False,
+    workers=1,
+    cancel=None,
+):
+    if mode not in search_modes:
+        raise ValueError(f"Unknown A* search mode: {mode!r}")
+    if workers != 1:
+        if mode != "astar":
+            raise ValueError(f"Parallel A* does not support mode {mode!r}")
+        from solvers.parallel_astar import solve_parallel_astar
+
+        return solve_parallel_astar(
+            start_goals,
+            ROWS,
+            COLS,
+            workers=workers,
+            engine=engine,
+            propagate=propagate,
+            cancel=cancel,
+        )
+    if mode == "ida":
+        return solve_idastar(
+            start_goals,
+            ROWS,
+            COLS,
+            engine,
+            tt_capacity,
+            propagate=propagate,
+            cancel=cancel,
+        )
+    g_weight, h_weight = search_modes[mode]
+    if h_weight is None:
+        h_weight = weight
+
+    board = make_board(engine, start_goals, ROWS, COLS, propagate=propagate)
+    start_node = board.initial_node()  # Khởi tạo node bắt đầu
     open_list = []  # Danh sách mở
     heapq.heappush(
         open_list, (start_node.f, start_node)  # (f, node)
     )  # Thêm node bắt đầu vào danh sách mở
-    state_cost = {}  # Từ điển lưu trữ chi phí của các trạng thái đã duyệt
+    # Bảng chuyển vị lưu chi phí của các trạng thái đã duyệt (theo khóa Zobrist)
+    state_cost = TranspositionTable(tt_capacity)
 
     # Khởi tạo các biến đếm
     nodes_generated = 0
@@ -178,12 +389,14 @@ def solve_astar(start_goals, ROWS, COLS):
 
     # Duyệt qua danh sách mở
     while open_list:
-        _, current = heapq.heappop(open_list)
+        if cancel is not None and cancel.is_set():
+            break
+        current = heapq.heappop(open_list)[-1]
         nodes_expanded += 1
         max_depth = max(max_depth, current.cost)
 
         # Kiểm tra đã đến đích chưa?
-        if is_goal(current):
+        if board.is_goal(current):
             end_time = time.time()
             return (
                 reconstruct_path(current),
@@ -194,22 +407,27 @@ def solve_astar(start_goals, ROWS, COLS):
             )
 
         # Mã hóa trạng thái hiện tại
-        current_state = encode_state(current.matrix, current.flows)
+        current_state = board.encode_state(current)
         # Kiểm tra trạng thái đã được duyệt chưa và chi phí có thấp hơn không?
-        if current_state in state_cost and state_cost[current_state] <= current.cost:
+        known_cost = state_cost.get(current_state)
+        if known_cost is not None and known_cost <= current.cost:
             continue
         # Cập nhật chi phí của trạng thái hiện tại
-        state_cost[current_state] = current.cost
+        state_cost.store(current_state, current.cost)
 
         # Tạo các node con từ node hiện tại và duyệt chúng
-        for child in generate_successors(current, start_goals, ROWS, COLS):
+        for child in board.generate_successors(current):
             nodes_generated += 1
-            child_state = encode_state(child.matrix, child.flows)
-            if child_state in state_cost and state_cost[child_state] <= child.cost:
+            child_state = board.encode_state(child)
+            known_cost = state_cost.get(child_state)
+            if known_cost is not None and known_cost <= child.cost:
                 continue
-            # Tính toán chi phí f = g + h
-            child.f = child.cost + heuristic(child, start_goals)
+            # Tính toán chi phí f theo chế độ tìm kiếm
+            child.f = g_weight * child.cost + h_weight * board.heuristic(child)
             # Thêm node con vào danh sách mở
-            heapq.heappush(open_list, (child.f, child))
+            if tie_break:
+                heapq.heappush(open_list, (child.f, board.empty_cells(child), child))
+            else:
+                heapq.heappush(open_list, (child.f, child))
 
     return None, None, nodes_generated, nodes_expanded, max_depth
@@ -0,0 +1,106 @@
+import time
+
+from solvers.astar_solver import make_board, reconstruct_path
+from solvers.zobrist import TranspositionTable
+
+
+# Một lượt beam search với độ rộng width: mỗi tầng chỉ giữ lại width node tốt
+# nhất theo (h, số ô trống). Trả về (node đích hoặc None, sinh, mở rộng, độ sâu,
+# đã cắt bớt node nào chưa); không cắt node nào thì lượt tìm là đầy đủ
+def beam_search(board, width, cancel=None):
+    start_node = board.initial_node()
+    beam = [start_node]
+    visited = TranspositionTable()  # Trạng thái đã đưa vào beam
+    visited.store(board.encode_state(start_node), start_node.cost)
+
+    # Khởi tạo các biến đếm
+    nodes_generated = 0
+    nodes_expanded = 0
+    max_depth = start_node.cost
+    pruned = False
+
+    while beam:
+        candidates = []
+        level = set()  # Trạng thái đã sinh ở tầng này (loại trùng trong tầng)
+        for node in beam:
+            if cancel is not None and cancel.is_set():
+                return None, nodes_generated, nodes_expanded, max_depth, pruned
+            nodes_expanded += 1
+            max_depth = max(max_depth, node.cost)
+            if board.is_goal(node):
+                return node, nodes_generated, nodes_expanded, max_depth, pruned
+            for child in board.generate_successors(node):
+                nodes_generated += 1
+                child_state = board.encode_state(child)
+                if child_state in visited or child_state in level:
+                    continue
+                level.add(child_state)
+                child.f = board.heuristic(child)
+                candidates.append(
+                    (child.f, board.empty_cells(child), child, child_state)
+                )
+
+        # Giữ lại width node tốt nhất cho tầng tiếp theo; chỉ các node này được
+        # đánh dấu đã vào beam, node bị cắt vẫn có thể được sinh lại
+        candidates.sort(key=lambda item: item[:2])
+        pruned = pruned or len(candidates) > width
+        beam = []
+        for _, _, child, child_state in candidates[:width]:
+            visited.store(child_state, child.cost)
+            beam.append(child)
+
+    return None, nodes_generated, nodes_expanded, max_depth, pruned
+
+
+# Giải bài toán bằng beam search: thời gian và bộ nhớ bị chặn bởi width,
+# đổi lại có thể bỏ sót lời giải. Khi thất bại, chạy lại tối đa restarts lần
+# với beam rộng hơn widen lần. stats (nếu truyền vào một dict) nhận exhausted =
+# True khi hết restarts mà lượt cuối đã cắt bớt node (chưa chắc vô nghiệm).
+# cancel: cờ dừng hợp tác (xem registry.CancelToken).
+def solve_beam(
+    start_goals,
+    ROWS,
+    COLS,
+    width=64,
+    restarts=2,
+    widen=4,
+    engine="matrix",
+    propagate=True,
+    stats=None,
+    cancel=None,
+):
+    start_time = time.time()
+    if stats is None:
+        stats = {}
+    stats.update(exhausted=False)
+    board = make_board(engine, start_goals, ROWS, COLS, propagate=propagate)
+
+    # Khởi tạo các biến đếm
+    nodes_generated = 0
+    nodes_expanded = 0
+    max_depth = 0
+
+    for _ in range(restarts + 1):
+        goal_node, generated, expanded, depth, pruned = beam_search(
+            board, width, cancel
+        )
+        nodes_generated += generated
+        nodes_expanded += expanded
+        max_depth = max(max_depth, depth)
+        if goal_node is not None:
+            return (
+                reconstruct_path(goal_node),
+                time.time() - start_time,
+                nodes_generated,
+                nodes_expanded,
+                max_depth,
+            )
+        if cancel is not None and cancel.is_set():
+            break
+        if not pruned:
+            break  # Lượt tìm không cắt node nào: đã duyệt hết, bài toán vô nghiệm
+        width *= widen
+    else:
+        stats["exhausted"] = True
+
+    return None, None, nodes_generated, nodes_expanded, max_depth
@@ -2,6 +2,9 @@ import copy
 import time
 from collections import deque
 
+from solvers.regions import find_forced_move, is_dead_state
+from solvers.zobrist import TranspositionTable, ZobristHasher
+
 directions = {
     "up": (-1, 0),
     "down": (1, 0),
@@ -17,17 +20,8 @@ class Node:
         self.parent = parent  # Node cha
         self.move = move  # Di chuyển từ node cha đến node này
         self.depth = depth  # Độ sâu của node trong cây tìm kiếm
-
-
-# Mã hóa trạng thái của ma trận và luồng màu
-def encode_state(matrix, flows):
-    parts = []
-    for row in matrix:
-        for cell in row:
-            parts.append(cell if cell else ".")
-    for color, pos in sorted(flows.items()):
-        parts.append(f"{color}{pos[0]}{pos[1]}")
-    return "".join(parts)
+        self.key = None  # Khóa Zobrist của trạng thái
+        self.forced = []  # Các nước đi bắt buộc áp dụng ngay sau move
 
 
 # Kiểm tra xem node hiện tại có phải là trạng thái mục tiêu không
@@ -59,11 +53,38 @@ def move_flow(matrix, flows, color, direction):
     return new_matrix, new_flows
 
 
+# Áp dụng liên tiếp các nước đi bắt buộc lên node (tại chỗ) cho đến khi không
+# còn, gộp chúng vào cạnh dẫn tới node và cập nhật khóa Zobrist tương ứng
+def propagate_forced(node, goals, ROWS, COLS, hasher=None):
+    while True:
+        move = find_forced_move(node.matrix, node.flows, goals, ROWS, COLS)
+        if move is None:
+            return
+        color, direction = move
+        r, c = node.flows[color]
+        dr, dc = directions[direction]
+        nr, nc = r + dr, c + dc
+        if hasher is not None:
+            node.key = hasher.move(
+                node.key,
+                hasher.color_index[color],
+                hasher.index((r, c)),
+                hasher.index((nr, nc)),
+                fill=node.matrix[nr][nc] is None,
+            )
+        node.matrix[nr][nc] = color
+        node.flows[color] = (nr, nc)
+        node.forced.append(move)
+        node.depth += 1
+
+
 # Hàm này dùng để lấy đường đi từ node hiện tại về node gốc
 def reconstruct_path(node):
     path = []
-    while node.parent:
-        path.append(node.move)
+    while node:
+        path.extend(reversed(node.forced))
+        if node.move:
+            path.append(node.move)
         node = node.parent
     return path[::-1]
 
@@ -87,8 +108,97 @@ def color_priority(matrix, flows, goals, ROWS, COLS):
     return [color for _, color in result]
 
 
+# Liệt kê các nước đi hợp lệ từ node: (màu, hướng, ô cũ, ô mới, giá trị ô mới).
+# partial_order=True chỉ rẽ nhánh trên luồng đang hoạt động (xem solve_bfs)
+def candidate_moves(node, start_goals, goal_positions, ROWS, COLS, partial_order):
+    colors = color_priority(node.matrix, node.flows, goal_positions, ROWS, COLS)
+    if partial_order and colors:
+        active = node.move[0] if node.move else None
+        colors = [active] if active in colors else colors[:1]
+
+    for color in colors:
+        r, c = node.flows[color]
+        goal = goal_positions[color]
+
+        for dir_name, (dr, dc) in directions.items():
+            nr, nc = r + dr, c + dc
+            if not (0 <= nr < ROWS and 0 <= nc < COLS):
+                continue
+            if (nr, nc) in [goal_positions[c2] for c2 in start_goals if c2 != color]:
+                continue
+
+            target = node.matrix[nr][nc]
+            if target is None or (nr, nc) == goal:
+                yield color, dir_name, (r, c), (nr, nc), target
+
+
 # Giải bài toán bằng thuật toán BFS với giới hạn số node mở rộng là max_nodes
-def solve_bfs(start_goals, ROWS, COLS, max_nodes=1000000):
+# partial_order=True: các nước đi trên những luồng khác nhau giao hoán với nhau,
+# nên mỗi node chỉ rẽ nhánh trên một luồng "đang hoạt động" (luồng vừa đi, nếu
+# chưa tới đích; nếu không thì luồng đầu tiên theo color_priority). Mọi lời giải
+# vẫn được sinh ra theo đúng một thứ tự chuẩn thay vì mọi hoán vị của nó.
+# Mặc định tắt để thứ tự nước đi và số node giữ nguyên như BFS đầy đủ.
+# external=True: dùng BFS bộ nhớ ngoài (xem external_bfs.solve_bfs_external).
+# workers khác 1 (None = số CPU): BFS song song theo tầng (xem
+# parallel_bfs.solve_parallel_bfs), không dùng cùng external=True;
+# min_parallel: số node tối thiểu của một tầng để chia cho các worker (None =
+# mặc định của solve_parallel_bfs), chỉ dùng cùng workers.
+# stats (nếu truyền vào một dict) nhận exhausted = True khi dừng vì max_nodes.
+# cancel: cờ dừng hợp tác (xem registry.CancelToken), kiểm tra ở mỗi node.
+def solve_bfs(
+    start_goals,
+    ROWS,
+    COLS,
+    max_nodes=1000000,
+    tt_capacity=None,
+    propagate=True,
+    partial_order=False,
+    external=False,
+    workers=1,
+    min_parallel=None,
+    stats=None,
+    cancel=None,
+):
+    if external and workers != 1:
+        raise ValueError("External BFS does not support workers")
+    if workers != 1:
+        from solvers.parallel_bfs import solve_parallel_bfs
+
+        options = {} if min_parallel is None else {"min_parallel": min_parallel}
+        return solve_parallel_bfs(
+            start_goals,
+            ROWS,
+            COLS,
+            max_nodes,
+            tt_capacity,
+            propagate=propagate,
+            partial_order=partial_order,
+            workers=workers,
+            stats=stats,
+            cancel=cancel,
+            **options,
+        )
+    if min_parallel is not None:
+        raise ValueError("Serial BFS does not support min_parallel")
+
+    # Chế độ bộ nhớ ngoài: frontier từng tầng được lưu trên đĩa
+    if external:
+        from solvers.external_bfs import solve_bfs_external
+
+        return solve_bfs_external(
+            start_goals,
+            ROWS,
+            COLS,
+            max_nodes,
+            propagate=propagate,
+            partial_order=partial_order,
+            stats=stats,
+            cancel=cancel,
+        )
+
+    if stats is None:
+        stats = {}
+    stats.update(exhausted=False)
     start_time = time.time()
     matrix = [[None for _ in range(COLS)] for _ in range(ROWS)]  # Ma trận ban đầu
     flows = {}  # Vị trí hiện tại của từng luồng màu
@@ -101,19 +211,29 @@ def solve_bfs(start_goals, ROWS, COLS, max_nodes=1000000):
         flows[color] = start
         goal_positions[color] = goal
 
+    # Khóa Zobrist được cập nhật tăng dần, tập visited là bảng chuyển vị gọn
+    hasher = ZobristHasher(list(start_goals), ROWS, COLS)
+
     # Khởi tạo node bắt đầu
     start_node = Node(matrix, flows)
+    start_node.key = hasher.hash_state(matrix, flows)
+    if propagate:
+        propagate_forced(start_node, goal_positions, ROWS, COLS, hasher)
     queue = deque([start_node])
-    visited = set([encode_state(matrix, flows)])
+    visited = TranspositionTable(tt_capacity)
+    visited.store(start_node.key, start_node.depth)
 
     # Khởi tạo các biến đếm
     nodes_generated = 1
     nodes_expanded = 0
-    max_depth = 0
+    max_depth = start_node.depth
 
     while queue:
         if nodes_expanded >= max_nodes:
             print(f"BFS: Vượt quá giới hạn mở rộng {max_nodes} node.")
+            stats["exhausted"] = True
+            break
+        if cancel is not None and cancel.is_set():
             break
 
         node = queue.popleft()
@@ -129,44 +249,46 @@ def solve_bfs(start_goals, ROWS, COLS, max_nodes=1000000):
                 max_depth,
             )
 
-        for color in color_priority(
-            node.matrix, node.flows, goal_positions, ROWS, COLS
+        for color, dir_name, (r, c), (nr, nc), target in candidate_moves(
+            node, start_goals, goal_positions, ROWS, COLS, partial_order
         ):
-            r, c = node.flows[color]
-            goal = goal_positions[color]
-
-            for dir_name, (dr, dc) in directions.items():
-                nr, nc = r + dr, c + dc
-                if not (0 <= nr < ROWS and 0 <= nc < COLS):
-                    continue
-                if (nr, nc) in [
-                    goal_positions[c2] for c2 in start_goals if c2 != color
-                ]:
-                    continue
-
-                target = node.matrix[nr][nc]
-                if target is None or (nr, nc) == goal:
-                    new_matrix, new_flows = move_flow(
-                        node.matrix, node.flows, color, dir_name
-                    )
-                    state_key = encode_state(new_matrix, new_flows)
-
-                    if state_key in visited:
-                        continue
+            state_key = hasher.move(
+                node.key,
+                hasher.color_index[color],
+                hasher.index((r, c)),
+                hasher.index((nr, nc)),
+                fill=target is None,
+            )
 
-                    visited.add(state_key)
+            if state_key in visited:
+                continue
+
+            visited.store(state_key, node.depth + 1)
+            new_matrix, new_flows = move_flow(node.matrix, node.flows, color, dir_name)
+            child = Node(
+                new_matrix,
+                new_flows,
+                parent=node,
+                move=(color, dir_name),
+                depth=node.depth + 1,
+            )
+            child.key = state_key
+
+            # Lan truyền nước đi bắt buộc trước khi rẽ nhánh
+            if propagate:
+                propagate_forced(child, goal_positions, ROWS, COLS, hasher)
+                if child.forced:
+                    if child.key in visited:
+                        continue
+                    visited.store(child.key, child.depth)
 
-                    child = Node(
-                        new_matrix,
-                        new_flows,
-                        parent=node,
-                        move=(color, dir_name),
-                        depth=node.depth + 1,
-                    )
+            # Loại bỏ trạng thái bế tắc (mất đường, vùng cô lập, ngõ cụt)
+            if is_dead_state(child.matrix, child.flows, goal_positions, ROWS, COLS):
+                continue
 
-                    max_depth = max(max_depth, child.depth)
+            max_depth = max(max_depth, child.depth)
 
-                    queue.append(child)
-                    nodes_generated += 1
+            queue.append(child)
+            nodes_generated += 1
 
     return None, None, nodes_generated, nodes_expanded, max_depth
@@ -0,0 +1,308 @@
+from solvers.zobrist import ZobristHasher
+
+directions = {
+    "up": (-1, 0),
+    "down": (1, 0),
+    "left": (0, -1),
+    "right": (0, 1),
+}  # Hướng di chuyển trong ma trận
+
+# Đếm số bit 1: int.bit_count chỉ có từ Python 3.10
+if hasattr(int, "bit_count"):
+    popcount = int.bit_count
+else:
+
+    def popcount(x):
+        return bin(x).count("1")
+
+
+class BitNode:
+    __slots__ = (
+        "paths",
+        "heads",
+        "occupied",
+        "key",
+        "parent",
+        "move",
+        "cost",
+        "f",
+        "forced",
+    )
+
+    def __init__(self, paths, heads, occupied, key, parent=None, move=None, cost=0):
+        self.paths = paths  # Bitmask các ô đã đi qua của từng luồng màu
+        self.heads = heads  # Chỉ số ô đầu luồng hiện tại của từng luồng màu
+        self.occupied = occupied  # Bitmask tất cả các ô đã bị chiếm
+        self.key = key  # Khóa Zobrist 64 bit của trạng thái
+        self.parent = parent  # Node cha
+        self.move = move  # Di chuyển từ node cha đến node này
+        self.cost = cost  # Chi phí từ node cha đến node này
+        self.f = 0  # Tổng chi phí (g + h)
+        self.forced = []  # Các nước đi bắt buộc áp dụng ngay sau move
+
+    def __lt__(self, other):  # So sánh hai node dựa trên chi phí f
+        return self.f < other.f
+
+
+# Bộ máy trạng thái dạng bitboard: ô (r, c) ứng với bit thứ r * COLS + c.
+# Mọi phép di chuyển, kiểm tra đích và mã hóa trạng thái đều là phép toán bit,
+# kết quả tìm kiếm trùng khớp với bộ máy ma trận trong astar_solver.
+class BitBoard:
+    def __init__(self, start_goals, ROWS, COLS, propagate=True):
+        self.start_goals = start_goals
+        self.propagate = propagate  # Có lan truyền nước đi bắt buộc hay không
+        self.ROWS = ROWS
+        self.COLS = COLS
+        self.size = ROWS * COLS
+        self.colors = list(start_goals)  # Thứ tự màu giống start_goals
+        self.full = (1 << self.size) - 1  # Bitmask toàn bộ lưới
+
+        # Mặt nạ loại bỏ các bit bị tràn sang hàng khác khi dịch trái/phải
+        first_col = 0
+        last_col = 0
+        for r in range(ROWS):
+            first_col |= 1 << (r * COLS)
+            last_col |= 1 << (r * COLS + COLS - 1)
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~last_col
+
+        # Tọa độ và danh sách ô kề (theo thứ tự directions) của từng ô
+        self.coords = [(i // COLS, i % COLS) for i in range(self.size)]
+        self.neighbors = []
+        for r, c in self.coords:
+            cell_neighbors = []
+            for name, (dr, dc) in directions.items():
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < ROWS and 0 <= nc < COLS:
+                    cell_neighbors.append((name, nr * COLS + nc))
+            self.neighbors.append(cell_neighbors)
+        # Bitmask các ô kề của từng ô
+        self.adjacent = [
+            sum(1 << target for _, target in cell_neighbors)
+            for cell_neighbors in self.neighbors
+        ]
+
+        self.starts = [self.index(start_goals[c][0]) for c in self.colors]
+        self.goals = [self.index(start_goals[c][1]) for c in self.colors]
+
+        self.hasher = ZobristHasher(self.colors, ROWS, COLS)
+
+    def index(self, pos):
+        return pos[0] * self.COLS + pos[1]
+
+    # Khởi tạo node gốc: mỗi luồng chỉ chiếm ô bắt đầu của nó
+    def initial_node(self):
+        paths = []
+        occupied = 0
+        key = 0
+        for k, start in enumerate(self.starts):
+            bit = 1 << start
+            paths.append(bit)
+            occupied |= bit
+            key ^= self.hasher.cell_keys[k][start] ^ self.hasher.head_keys[k][start]
+        node = BitNode(tuple(paths), tuple(self.starts), occupied, key)
+        if self.propagate:
+            self.propagate_forced(node)
+        return node
+
+    # Mã hóa trạng thái: khóa đã được cập nhật tăng dần trong move_flow
+    def encode_state(self, node):
+        return node.key
+
+    # Kiểm tra đích: mọi bit của lưới đều đã bị chiếm
+    def is_goal(self, node):
+        return node.occupied == self.full
+
+    # Kiểm tra xem luồng k có thể đi vào ô target không?
+    def can_enter(self, node, k, target):
+        bit = 1 << target
+        if not node.occupied & bit:
+            return True
+        return bool(node.paths[k] & bit) and target == self.goals[k]
+
+    # Áp dụng tại chỗ nước đi của luồng k vào ô target (node phải là node mới tạo)
+    def apply_move(self, node, k, target):
+        bit = 1 << target
+        paths = list(node.paths)
+        paths[k] |= bit
+        heads = list(node.heads)
+        old_head = heads[k]
+        heads[k] = target
+        fill = not node.occupied & bit
+        node.key = self.hasher.move(node.key, k, old_head, target, fill)
+        node.paths = tuple(paths)
+        node.heads = tuple(heads)
+        node.occupied |= bit
+        node.cost += 1
+
+    # Tạo node mới khi luồng k đi vào ô target
+    def move_flow(self, node, k, target, direction):
+        child = BitNode(
+            node.paths,
+            node.heads,
+            node.occupied,
+            node.key,
+            parent=node,
+            move=(self.colors[k], direction),
+            cost=node.cost,
+        )
+        self.apply_move(child, k, target)
+        return child
+
+    # Tìm nước đi bắt buộc (cùng quy tắc với regions.find_forced_move),
+    # trả về (k, hướng, ô đích) hoặc None
+    def find_forced_move(self, node):
+        active = [k for k, head in enumerate(node.heads) if head != self.goals[k]]
+        endpoints = 0
+        for k in active:
+            endpoints |= (1 << node.heads[k]) | (1 << self.goals[k])
+        empty = self.full & ~node.occupied & ~endpoints
+
+        for k in active:
+            goal = self.goals[k]
+            goal_bit = 1 << goal
+            goal_open = not node.occupied & goal_bit or node.paths[k] & goal_bit
+            legal = [
+                (direction, target)
+                for direction, target in self.neighbors[node.heads[k]]
+                if empty >> target & 1 or (target == goal and goal_open)
+            ]
+            if len(legal) == 1:
+                return (k,) + legal[0]
+
+        free = empty | endpoints
+        for k in active:
+            for direction, target in self.neighbors[node.heads[k]]:
+                if not empty >> target & 1:
+                    continue
+                if popcount(self.adjacent[target] & free) == 2:
+                    return k, direction, target
+        return None
+
+    # Áp dụng liên tiếp các nước đi bắt buộc, gộp chúng vào cạnh dẫn tới node
+    def propagate_forced(self, node):
+        while True:
+            forced = self.find_forced_move(node)
+            if forced is None:
+                return
+            k, direction, target = forced
+            self.apply_move(node, k, target)
+            node.forced.append((self.colors[k], direction))
+
+    # Loang song song bằng phép dịch bit: trả về tập ô đến được từ seed trong passable
+    def flood(self, seed, passable):
+        reach = seed
+        while True:
+            grow = (
+                ((reach << 1) & self.not_first_col)
+                | ((reach >> 1) & self.not_last_col)
+                | (reach << self.COLS)
+                | (reach >> self.COLS)
+            ) & passable
+            new_reach = reach | grow
+            if new_reach == reach:
+                return reach
+            reach = new_reach
+
+    # Phân tích vùng trống trong một lượt (cùng quy tắc với regions.analyze_regions):
+    # luồng nào còn tới được đích, có vùng bị cô lập không, có ô ngõ cụt không
+    def analyze_regions(self, node):
+        active = [k for k, head in enumerate(node.heads) if head != self.goals[k]]
+        endpoints = 0
+        for k in active:
+            endpoints |= (1 << node.heads[k]) | (1 << self.goals[k])
+        empty = self.full & ~node.occupied & ~endpoints
+
+        # Đếm song song số ô kề tự do: twos chứa các ô có từ 2 ô kề tự do trở lên
+        free = empty | endpoints
+        ones = twos = 0
+        for shifted in (
+            (free << self.COLS) & self.full,
+            free >> self.COLS,
+            (free << 1) & self.not_first_col,
+            (free >> 1) & self.not_last_col,
+        ):
+            twos |= ones & shifted
+            ones |= shifted
+        dead_cell = bool(empty & ~twos)
+
+        # Tách các vùng trống liên thông
+        regions = []
+        remaining = empty
+        while remaining:
+            region = self.flood(remaining & -remaining, empty)
+            regions.append(region)
+            remaining &= ~region
+
+        reachable = {color: True for color in self.colors}
+        entered = 0  # Bitmask các vùng có luồng đi vào được
+        for k in active:
+            head, goal = node.heads[k], self.goals[k]
+            goal_bit = 1 << goal
+            if node.occupied & goal_bit and not node.paths[k] & goal_bit:
+                reachable[self.colors[k]] = False  # Đích đã bị màu khác chiếm
+                continue
+            ok = bool(self.adjacent[head] & goal_bit)
+            for i, region in enumerate(regions):
+                if region & self.adjacent[head] and region & self.adjacent[goal]:
+                    entered |= 1 << i
+                    ok = True
+            reachable[self.colors[k]] = ok
+
+        stranded = entered != (1 << len(regions)) - 1
+        return reachable, stranded, dead_cell
+
+    # Phát hiện trạng thái bế tắc chỉ với một lần phân tích vùng
+    def detect_dead_end(self, node):
+        reachable, stranded, dead_cell = self.analyze_regions(node)
+        return stranded or dead_cell or not all(reachable.values())
+
+    # Đếm số hướng có thể đi cho luồng k
+    def count_valid_moves(self, node, k):
+        return sum(
+            1
+            for _, target in self.neighbors[node.heads[k]]
+            if self.can_enter(node, k, target)
+        )
+
+    # Chọn luồng màu di chuyển tiếp theo (cùng tiêu chí với choose_flow)
+    def choose_flow(self, node):
+        best_k = None
+        best_score = float("inf")
+        for k, head in enumerate(node.heads):
+            goal = self.goals[k]
+            if head != goal:
+                moves = self.count_valid_moves(node, k)
+                (r, c), (gr, gc) = self.coords[head], self.coords[goal]
+                score = moves + abs(gr - r) + abs(gc - c)
+                if score < best_score:
+                    best_score = score
+                    best_k = k
+        return best_k
+
+    # Tạo các node con từ node hiện tại
+    def generate_successors(self, node):
+        k = self.choose_flow(node)
+        if k is None:
+            return []
+        successors = []
+        for direction, target in self.neighbors[node.heads[k]]:
+            if self.can_enter(node, k, target):
+                child = self.move_flow(node, k, target, direction)
+                if self.propagate:
+                    self.propagate_forced(child)
+                if not self.detect_dead_end(child):
+                    successors.append(child)
+        return successors
+
+    # Số ô còn trống
+    def empty_cells(self, node):
+        return popcount(self.full & ~node.occupied)
+
+    # Hàm đánh giá h(n): tổng khoảng cách Manhattan từ đầu luồng đến đích
+    def heuristic(self, node):
+        total = 0
+        for k, head in enumerate(node.heads):
+            (r, c), (gr, gc) = self.coords[head], self.coords[self.goals[k]]
+            total += abs(gr - r) + abs(gc - c)
+        return total
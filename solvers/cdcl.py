@@ -0,0 +1,246 @@
+import heapq
+
+
+# Dãy Luby (1, 1, 2, 1, 1, 2, 4, ...) dùng để lên lịch khởi động lại
+def luby(i):
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) >> 1
+        seq -= 1
+        i %= size
+    return 1 << seq
+
+
+# Bộ giải SAT CDCL thuần Python: lan truyền đơn vị bằng hai literal theo dõi
+# (watched literals), học mệnh đề theo 1UIP rồi quay lui không theo thứ tự,
+# chọn biến theo VSIDS, lưu pha và khởi động lại theo dãy Luby.
+# Literal là số nguyên khác 0 theo quy ước DIMACS (-v là phủ định của v).
+class CDCLSolver:
+    def __init__(self, num_vars, clauses=(), restart_base=100, decay=0.95):
+        self.num_vars = num_vars
+        self.restart_base = restart_base
+        self.decay = decay
+        self.value = [0] * (num_vars + 1)  # 1 = đúng, -1 = sai, 0 = chưa gán
+        self.level = [0] * (num_vars + 1)
+        self.reason = [None] * (num_vars + 1)  # Mệnh đề đã suy ra biến
+        self.phase = [False] * (num_vars + 1)  # Pha đã lưu của từng biến
+        self.activity = [0.0] * (num_vars + 1)
+        self.var_inc = 1.0
+        self.heap = [(0.0, v) for v in range(1, num_vars + 1)]
+        self.watches = [[] for _ in range(2 * num_vars + 1)]  # Chỉ số: lit + n
+        self.trail = []
+        self.trail_lim = []  # Vị trí bắt đầu mỗi mức quyết định trên trail
+        self.qhead = 0
+        self.inconsistent = False  # Đã suy ra mệnh đề rỗng
+
+        # Khởi tạo các biến đếm
+        self.decisions = 0
+        self.conflicts = 0
+        self.propagations = 0
+        self.restarts = 0
+        self.learnt = 0
+
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def lit_value(self, lit):
+        v = self.value[abs(lit)]
+        return v if lit > 0 else -v
+
+    def enqueue(self, lit, reason):
+        v = abs(lit)
+        self.value[v] = 1 if lit > 0 else -1
+        self.level[v] = len(self.trail_lim)
+        self.reason[v] = reason
+        self.trail.append(lit)
+
+    def watch(self, clause):
+        self.watches[clause[0] + self.num_vars].append(clause)
+        self.watches[clause[1] + self.num_vars].append(clause)
+
+    # Thêm mệnh đề (có thể gọi giữa các lần solve); mọi phép gán quay về mức 0
+    def add_clause(self, clause):
+        if self.trail_lim:
+            self.cancel_until(0)
+        value = self.value
+        kept = []
+        for lit in dict.fromkeys(clause):
+            v = value[lit] if lit > 0 else -value[-lit]
+            if v == 1:
+                return  # Đã thỏa ở mức 0
+            if v == 0:
+                kept.append(lit)
+        if len(set(map(abs, kept))) < len(kept):
+            return  # Mệnh đề luôn đúng (chứa cả lit và -lit)
+        clause = kept
+        if not clause:
+            self.inconsistent = True
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            if self.propagate() is not None:
+                self.inconsistent = True
+        else:
+            self.watch(clause)
+
+    # Lan truyền đơn vị; trả về mệnh đề xung đột hoặc None
+    def propagate(self):
+        n = self.num_vars
+        while self.qhead < len(self.trail):
+            false_lit = -self.trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            watchers = self.watches[false_lit + n]
+            kept = []
+            k = 0
+            while k < len(watchers):
+                clause = watchers[k]
+                k += 1
+                # Giữ literal vừa bị gán sai ở vị trí 1
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if self.lit_value(first) == 1:
+                    kept.append(clause)
+                    continue
+                # Tìm literal khác chưa sai để theo dõi thay
+                for m in range(2, len(clause)):
+                    if self.lit_value(clause[m]) != -1:
+                        clause[1], clause[m] = clause[m], clause[1]
+                        self.watches[clause[1] + n].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if self.lit_value(first) == -1:
+                        kept.extend(watchers[k:])
+                        self.watches[false_lit + n] = kept
+                        self.qhead = len(self.trail)
+                        return clause
+                    self.enqueue(first, clause)
+            self.watches[false_lit + n] = kept
+        return None
+
+    def bump(self, v):
+        self.activity[v] += self.var_inc
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.var_inc *= 1e-100
+            self.heap = [(-self.activity[u], u) for u in range(1, self.num_vars + 1)]
+            heapq.heapify(self.heap)
+        else:
+            heapq.heappush(self.heap, (-self.activity[v], v))
+
+    # Phân tích xung đột theo 1UIP; trả về (mệnh đề học được, mức quay lui)
+    def analyze(self, conflict):
+        current = len(self.trail_lim)
+        seen = set()
+        learnt = [0]
+        counter = 0
+        lit = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in clause if lit is None else clause[1:]:
+                v = abs(q)
+                if v not in seen and self.level[v] > 0:
+                    seen.add(v)
+                    self.bump(v)
+                    if self.level[v] == current:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            # Literal gần nhất trên trail thuộc tập đang xét
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            clause = self.reason[abs(lit)]
+            seen.discard(abs(lit))
+            counter -= 1
+            if counter == 0:
+                break
+        learnt[0] = -lit
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Đưa literal có mức cao nhất (ngoài UIP) lên vị trí 1 để theo dõi
+        best = max(range(1, len(learnt)), key=lambda i: self.level[abs(learnt[i])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def cancel_until(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            v = abs(lit)
+            self.phase[v] = lit > 0
+            self.value[v] = 0
+            self.reason[v] = None
+            heapq.heappush(self.heap, (-self.activity[v], v))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    # Chọn biến chưa gán có độ hoạt động lớn nhất (VSIDS), gán theo pha đã lưu
+    def pick_branch(self):
+        while self.heap:
+            _, v = heapq.heappop(self.heap)
+            if self.value[v] == 0:
+                return v if self.phase[v] else -v
+        return None
+
+    # Giải; trả về True (model trong self.model), False nếu vô nghiệm hoặc None
+    # nếu vượt quá max_conflicts xung đột hoặc cờ cancel bật (kiểm tra ở mỗi
+    # xung đột)
+    def solve(self, max_conflicts=None, cancel=None):
+        self.model = None
+        if self.inconsistent:
+            return False
+        self.cancel_until(0)
+        if self.propagate() is not None:
+            self.inconsistent = True
+            return False
+
+        conflicts_left = self.restart_base * luby(self.restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts_left -= 1
+                if not self.trail_lim:
+                    self.inconsistent = True
+                    return False
+                learnt, back_level = self.analyze(conflict)
+                self.cancel_until(back_level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.watch(learnt)
+                    self.enqueue(learnt[0], learnt)
+                    self.learnt += 1
+                self.var_inc /= self.decay
+                if max_conflicts is not None and self.conflicts >= max_conflicts:
+                    self.cancel_until(0)
+                    return None
+                if cancel is not None and cancel.is_set():
+                    self.cancel_until(0)
+                    return None
+                continue
+
+            if conflicts_left <= 0:
+                # Khởi động lại: giữ mệnh đề đã học và pha đã lưu
+                self.restarts += 1
+                conflicts_left = self.restart_base * luby(self.restarts)
+                self.cancel_until(0)
+                continue
+
+            lit = self.pick_branch()
+            if lit is None:
+                self.model = [0] + [v > 0 for v in self.value[1:]]
+                return True
+            self.decisions += 1
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(lit, None)
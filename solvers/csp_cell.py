@@ -0,0 +1,186 @@
+from solvers.bitboard import popcount
+from solvers.csp_solver import directions
+
+# Mô hình CSP theo ô: mỗi ô là một biến gồm
+#   shape: tập hướng nối sang ô kề (bit d ứng với directions[d]), miền giá trị là
+#          bitmask 16 bit trên các tập hướng; đầu/đích có đúng 1 hướng, ô giữa 2
+#   color: bitmask các màu ô có thể mang
+# Ràng buộc giữa hai ô kề i, j: i nối sang j <=> j nối sang i, và nếu có nối
+# thì hai ô cùng màu. Lan truyền bằng AC-3 trên các cung (ô, hướng).
+has_dir = [sum(1 << s for s in range(16) if s >> d & 1) for d in range(4)]
+
+
+def opposite(d):
+    return d ^ 1  # up <-> down, left <-> right (theo thứ tự directions)
+
+
+class CellModel:
+    def __init__(self, start_goals, ROWS, COLS):
+        self.ROWS = ROWS
+        self.COLS = COLS
+        self.size = ROWS * COLS
+        self.colors = list(start_goals)
+
+        # Ô kề theo từng hướng (-1 nếu ra ngoài lưới)
+        self.neighbor = []
+        for i in range(self.size):
+            r, c = divmod(i, COLS)
+            cell = []
+            for dr, dc in directions:
+                nr, nc = r + dr, c + dc
+                inside = 0 <= nr < ROWS and 0 <= nc < COLS
+                cell.append(nr * COLS + nc if inside else -1)
+            self.neighbor.append(cell)
+
+        self.endpoints = {}  # Ô đầu/đích -> chỉ số màu
+        self.starts = []
+        for k, (start, goal) in enumerate(start_goals.values()):
+            self.starts.append(start[0] * COLS + start[1])
+            self.endpoints[start[0] * COLS + start[1]] = k
+            self.endpoints[goal[0] * COLS + goal[1]] = k
+
+    # Miền giá trị ban đầu của mọi ô
+    def initial_domains(self):
+        all_colors = (1 << len(self.colors)) - 1
+        shapes = []
+        colors = []
+        for i in range(self.size):
+            valid = [d for d in range(4) if self.neighbor[i][d] != -1]
+            if i in self.endpoints:
+                shapes.append(sum(1 << (1 << d) for d in valid))
+                colors.append(1 << self.endpoints[i])
+            else:
+                shapes.append(
+                    sum(
+                        1 << ((1 << a) | (1 << b))
+                        for a in valid
+                        for b in valid
+                        if a < b
+                    )
+                )
+                colors.append(all_colors)
+        return shapes, colors
+
+    # AC-3: thu hẹp miền giá trị (tại chỗ) cho tới khi mọi cung nhất quán.
+    # queue chứa các ô vừa thay đổi; trả về False nếu có miền rỗng.
+    def propagate(self, shapes, colors, queue):
+        pending = set(queue)
+        while queue:
+            j = queue.pop()
+            pending.discard(j)
+            for d in range(4):
+                i = self.neighbor[j][d]
+                if i == -1:
+                    continue
+                # Sửa ô i theo ô j (i nối sang j theo hướng opposite(d))
+                e = opposite(d)
+                j_shape = shapes[j]
+                can_link = j_shape & has_dir[d] and colors[i] & colors[j]
+                must_link = not j_shape & ~has_dir[d]
+                shape = shapes[i]
+                if not can_link:
+                    shape &= ~has_dir[e]
+                if must_link:
+                    shape &= has_dir[e]
+                color = colors[i]
+                if shape and not shape & ~has_dir[e]:
+                    color &= colors[j]  # Chắc chắn nối => cùng màu
+                if not shape or not color:
+                    return False
+                if shape != shapes[i] or color != colors[i]:
+                    shapes[i] = shape
+                    colors[i] = color
+                    if i not in pending:
+                        pending.add(i)
+                        queue.append(i)
+        return True
+
+    # Các cạnh chắc chắn được nối có tạo thành chu trình không (union-find)
+    def has_cycle(self, shapes):
+        parent = list(range(self.size))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for i in range(self.size):
+            for d in (1, 3):  # Mỗi cạnh xét một lần: xuống dưới và sang phải
+                j = self.neighbor[i][d]
+                if j == -1 or shapes[i] & ~has_dir[d]:
+                    continue
+                root_i, root_j = find(i), find(j)
+                if root_i == root_j:
+                    return True
+                parent[root_i] = root_j
+        return False
+
+    # Chọn ô còn nhiều hơn một giá trị shape với miền nhỏ nhất (MRV)
+    def select_cell(self, shapes):
+        best = -1
+        best_size = 17
+        for i, shape in enumerate(shapes):
+            size = popcount(shape)
+            if 1 < size < best_size:
+                best, best_size = i, size
+                if size == 2:
+                    break
+        return best
+
+    # Lần theo các hướng nối từ ô đầu của mỗi màu để lấy danh sách ô theo thứ tự
+    def extract_paths(self, shapes):
+        paths = {}
+        for k, start in enumerate(self.starts):
+            prev, cell = -1, start
+            path = [divmod(start, self.COLS)]
+            while True:
+                shape = shapes[cell].bit_length() - 1  # Miền chỉ còn một giá trị
+                nxt = next(
+                    self.neighbor[cell][d]
+                    for d in range(4)
+                    if shape >> d & 1 and self.neighbor[cell][d] != prev
+                )
+                prev, cell = cell, nxt
+                path.append(divmod(cell, self.COLS))
+                if cell in self.endpoints:
+                    break
+            paths[self.colors[k]] = path
+        return paths
+
+
+# Tìm kiếm quay lui: gán shape cho ô được chọn rồi lan truyền AC-3.
+# Dừng (trả về None) khi cờ cancel bật
+def search(model, shapes, colors, cancel=None):
+    if cancel is not None and cancel.is_set():
+        return None
+    if model.has_cycle(shapes):
+        return None
+    i = model.select_cell(shapes)
+    if i == -1:
+        return shapes
+
+    values = shapes[i]
+    while values:
+        bit = values & -values
+        values ^= bit
+        new_shapes = list(shapes)
+        new_colors = list(colors)
+        new_shapes[i] = bit
+        if model.propagate(new_shapes, new_colors, [i]):
+            result = search(model, new_shapes, new_colors, cancel)
+            if result is not None:
+                return result
+    return None
+
+
+# Giải bằng mô hình theo ô, trả về {màu: danh sách ô} hoặc None
+def solve_cell_csp(start_goals, ROWS, COLS, cancel=None):
+    model = CellModel(start_goals, ROWS, COLS)
+    shapes, colors = model.initial_domains()
+    if not model.propagate(shapes, colors, list(range(model.size))):
+        return None
+    result = search(model, shapes, colors, cancel)
+    if result is None:
+        return None
+    return model.extract_paths(result)
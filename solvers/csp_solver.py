@@ -1,5 +1,7 @@
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
+
+from solvers.bitboard import BitBoard, popcount
 
 directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 
@@ -17,24 +19,78 @@ def get_neighbors(pos, ROWS, COLS):
     ]
 
 
-def find_all_paths(start, goal, matrix, color, ROWS, COLS, max_length=20):
-    paths = []
-    stack = [(start, [start])]
+# Sinh lần lượt (lazy) các đường đi đơn của luồng thứ k dưới dạng bitmask ô,
+# dài tối đa max_length ô. Mỗi tập ô chỉ được trả về một lần; nhánh nào làm
+# đứt đường nối giữa hai đầu của một màu khác bị cắt ngay khi sinh.
+# Dừng sinh khi cờ cancel bật.
+def iter_paths(board, k, max_length, cancel=None):
+    start, goal = board.starts[k], board.goals[k]
+    endpoints = 0
+    for j in range(len(board.colors)):
+        endpoints |= (1 << board.starts[j]) | (1 << board.goals[j])
+    free = board.full & ~endpoints  # Ô trống ban đầu
+    # Bitmask ô kề của hai đầu các màu khác (bỏ qua màu có hai đầu kề nhau)
+    others = [
+        (board.adjacent[board.starts[j]], board.adjacent[board.goals[j]])
+        for j in range(len(board.colors))
+        if j != k and not board.adjacent[board.starts[j]] >> board.goals[j] & 1
+    ]
+    passable = free | (1 << goal)
+    seen = set()
+    stack = [(start, 1 << start, 1)]
     while stack:
-        (r, c), path = stack.pop()
-        if len(path) > max_length:
+        if cancel is not None and cancel.is_set():
+            return
+        idx, mask, length = stack.pop()
+        if idx == goal:
+            if mask not in seen:
+                seen.add(mask)
+                yield mask
             continue
-        if (r, c) == goal:
-            paths.append(path)
+        if length >= max_length:
             continue
-        for nr, nc in get_neighbors((r, c), ROWS, COLS):
-            if (matrix[nr][nc] is None or (nr, nc) == goal) and (nr, nc) not in path:
-                stack.append(((nr, nc), path + [(nr, nc)]))
-    return paths
+        step = board.adjacent[idx] & passable & ~mask
+        while step:
+            bit = step & -step
+            step ^= bit
+            new_mask = mask | bit
+            if cuts_off(board, free & ~new_mask, others):
+                continue
+            stack.append((bit.bit_length() - 1, new_mask, length + 1))
+
+
+# Đường đi có làm một màu khác không còn nối được hai đầu của nó không: loang
+# từng vùng ô trống một lần, màu còn nối được nếu có vùng kề cả hai đầu của nó
+def cuts_off(board, free, others):
+    remaining = free
+    while others and remaining:
+        region = board.flood(remaining & -remaining, free)
+        remaining &= ~region
+        others = [
+            (start_adj, goal_adj)
+            for start_adj, goal_adj in others
+            if not (start_adj & region and goal_adj & region)
+        ]
+    return bool(others)
 
 
-def paths_conflict(p1, p2):
-    return any(cell in p2 for cell in p1)
+# Dựng lại danh sách ô theo thứ tự từ bitmask của đường đi đã chọn
+def mask_to_path(board, k, mask):
+    start, goal = board.starts[k], board.goals[k]
+    stack = [(start, mask & ~(1 << start), [start])]
+    while stack:
+        idx, rest, order = stack.pop()
+        if idx == goal:
+            if not rest:
+                return [board.coords[i] for i in order]
+            continue
+        step = board.adjacent[idx] & rest
+        while step:
+            bit = step & -step
+            step ^= bit
+            target = bit.bit_length() - 1
+            stack.append((target, rest & ~bit, order + [target]))
+    return None
 
 
 def compute_degrees(start_goals, ROWS, COLS):
@@ -51,78 +107,245 @@ def compute_degrees(start_goals, ROWS, COLS):
     return {c: len(neigh) for c, neigh in color_neighbors.items()}
 
 
+# Chỉ mục xung đột giữa các đường đi: mỗi màu có danh sách bitmask đường đi
+# (đánh số theo vị trí), miền giá trị là tập số hiệu dạng bitset, còn users[ô]
+# là chỉ mục ngược {màu: bitset các đường đi của màu đó đi qua ô}. Tập đường đi
+# xung đột với một đường đi là hợp các bitset của những ô nó đi qua.
+class ConflictIndex:
+    def __init__(self, paths, size):
+        self.paths = paths
+        self.users = [{} for _ in range(size)]
+        for color, masks in paths.items():
+            for i, mask in enumerate(masks):
+                while mask:
+                    bit = mask & -mask
+                    mask ^= bit
+                    cell = self.users[bit.bit_length() - 1]
+                    cell[color] = cell.get(color, 0) | (1 << i)
+        self.cache = {}  # (màu, số hiệu) -> {màu khác: bitset xung đột}
+
+    def full_domain(self, color):
+        return (1 << len(self.paths[color])) - 1
+
+    def conflicts(self, color, i):
+        key = (color, i)
+        if key not in self.cache:
+            result = {}
+            mask = self.paths[color][i]
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                for other, ids in self.users[bit.bit_length() - 1].items():
+                    if other != color:
+                        result[other] = result.get(other, 0) | ids
+            self.cache[key] = result
+        return self.cache[key]
+
+    # Tìm một ô trong cells không còn đường đi nào trong miền của các màu
+    # colors đi qua; trả về chỉ số ô hoặc -1 nếu mọi ô đều còn phủ được
+    def uncoverable_cell(self, domains, colors, cells):
+        cells &= (1 << len(self.users)) - 1
+        while cells:
+            bit = cells & -cells
+            cells ^= bit
+            users = self.users[bit.bit_length() - 1]
+            if not any(domains[color] & users.get(color, 0) for color in colors):
+                return bit.bit_length() - 1
+        return -1
+
+
+# Liệt kê các số hiệu trong một bitset
+def iter_ids(ids):
+    while ids:
+        bit = ids & -ids
+        ids ^= bit
+        yield bit.bit_length() - 1
+
+
 def order_colors(domains, degrees):
     return sorted(
-        domains.keys(), key=lambda c: (len(domains[c]), -degrees.get(c, 0))
+        domains.keys(), key=lambda c: (popcount(domains[c]), -degrees.get(c, 0))
     )  # MRV + Degree
 
 
-def order_paths(color, domains, remaining_colors):
-    # LCV: path ít xung đột với các path còn lại
-    paths = domains[color]
+def order_paths(color, domains, remaining_colors, index):
+    # LCV: path ít xung đột với các path còn lại. Số xung đột được đếm bằng
+    # popcount trên miền hiện tại nên tự cập nhật khi miền bị thu hẹp.
     score_path_pairs = []
-    for path in paths:
+    for i in iter_ids(domains[color]):
+        conflicts = index.conflicts(color, i)
         score = 0
         for other in remaining_colors:
-            for other_path in domains[other]:
-                if paths_conflict(path[1:], other_path[1:]):
-                    score += 1
-        score_path_pairs.append((score, path))
+            score += popcount(domains[other] & conflicts.get(other, 0))
+        score_path_pairs.append((score, i))
     score_path_pairs.sort()
-    return [p for _, p in score_path_pairs]
+    return [i for _, i in score_path_pairs]
 
 
-def forward_check(domains, color, selected_path):
+# Chỉ loại các đường đi có chung ô với đường đi vừa chọn (tra qua chỉ mục ngược)
+def forward_check(domains, color, selected, index):
     new_domains = {}
+    conflicts = index.conflicts(color, selected)
     for other_color in domains:
         if other_color == color:
             continue
-        new_list = [
-            p
-            for p in domains[other_color]
-            if not paths_conflict(selected_path[1:], p[1:])
-        ]
-        if not new_list:
-            return None  # fail early
-        new_domains[other_color] = new_list
-    return new_domains
-
-
-def validate_fill(assignments, ROWS, COLS):
-    grid = [[None for _ in range(COLS)] for _ in range(ROWS)]
-    for color, path in assignments.items():
-        for r, c in path:
-            if grid[r][c] is not None:
-                return False
-            grid[r][c] = color
-
-    for r in range(ROWS):
-        for c in range(COLS):
-            if grid[r][c] is None:
-                return False
-    return True
-
-
-def backtrack(assignments, domains, colors, index, start_goals, ROWS, COLS):
-    if index == len(colors):
-        return validate_fill(assignments, ROWS, COLS)
-
-    color = colors[index]
-    remaining_colors = colors[index + 1 :]
-    ordered_paths = order_paths(color, domains, remaining_colors)
-
-    for path in ordered_paths:
-        assignments[color] = path
-        new_domains = forward_check(domains, color, path)
-        if new_domains is not None:
-            new_domains[color] = [path]  # fix current
-            if backtrack(
-                assignments, new_domains, colors, index + 1, start_goals, ROWS, COLS
-            ):
-                return True
-        del assignments[color]
+        new_domains[other_color] = domains[other_color] & ~conflicts.get(
+            other_color, 0
+        )
+    return new_domains  # Miền rỗng (0) được người gọi xử lý
+
+
+# Kho nogood có giới hạn: mỗi nogood là danh sách (màu, đường đi) theo thứ tự
+# gán, được treo vào phần tử gán sau cùng nên chỉ cần kiểm tra khi gán phần tử
+# đó. Khi đầy, nogood cũ nhất bị loại.
+class NogoodStore:
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.watch = {}  # (màu, đường đi) gán sau cùng -> các phần còn lại
+        self.order = deque()
+
+    def __len__(self):
+        return len(self.order)
+
+    def add(self, nogood):
+        key, rest = nogood[-1], tuple(nogood[:-1])
+        self.watch.setdefault(key, []).append(rest)
+        self.order.append((key, rest))
+        if len(self.order) > self.capacity:
+            old_key, old_rest = self.order.popleft()
+            bucket = self.watch[old_key]
+            bucket.remove(old_rest)
+            if not bucket:
+                del self.watch[old_key]
+
+    # Trả về phần còn lại của một nogood bị vi phạm khi gán path cho color
+    def match(self, color, path, assignments):
+        for rest in self.watch.get((color, path), ()):
+            if all(assignments.get(c) == p for c, p in rest):
+                return rest
+        return None
+
+
+# Quay lui với nhảy lui theo xung đột (conflict-directed backjumping) kết hợp
+# forward checking. Tập xung đột là bitmask các mức gán: pruned[màu] ghi các mức
+# đã thu hẹp miền của màu đó. Khi cả nhánh con thất bại mà mức hiện tại không
+# nằm trong tập xung đột của nó thì nhảy thẳng về mức gây xung đột.
+# Tập ô đã phủ (covered) được giữ theo từng bước gán; sau mỗi lần gán, nếu một ô
+# trống không còn đường đi nào của các màu chưa gán đi qua được thì cắt nhánh.
+class Backtracker:
+    def __init__(self, colors, conflicts, size, nogood_capacity=10000):
+        self.colors = colors
+        self.conflicts = conflicts
+        self.full = (1 << size) - 1
+        self.nogoods = NogoodStore(nogood_capacity) if nogood_capacity else None
+        self.assignments = {}
+        self.cancel = None  # Cờ dừng tìm kiếm (Event hoặc registry.CancelToken)
+
+        # Khởi tạo các biến đếm
+        self.nodes_generated = 0  # Số giá trị (đường đi) đã thử gán
+        self.nodes_expanded = 0  # Số lần chọn biến
+        self.max_depth = 0
+        self.backjumps = 0
+        self.nogood_hits = 0
+
+    # Các mức có thể làm ô cell được phủ: mức đã gán màu có đường đi qua ô
+    # và các mức đã thu hẹp miền của những màu chưa gán
+    def coverage_conflict(self, cell, index, pruned):
+        users = self.conflicts.users[cell]
+        levels = 0
+        for level in range(index + 1):
+            if self.colors[level] in users:
+                levels |= 1 << level
+        for color in self.colors[index + 1 :]:
+            levels |= pruned[color]
+        return levels
+
+    # Gán đường đi thứ i cho biến ở mức index rồi forward check.
+    # Trả về (miền mới, ô đã phủ, pruned mới, tập xung đột nếu thất bại hoặc 0)
+    def assign(self, index, i, domains, covered, pruned):
+        color = self.colors[index]
+        bit = 1 << index
+        remaining_colors = self.colors[index + 1 :]
+        new_domains = forward_check(domains, color, i, self.conflicts)
+        new_pruned = dict(pruned)
+        new_covered = covered | self.conflicts.paths[color][i]
+        for other in remaining_colors:
+            if new_domains[other] != domains[other]:
+                new_pruned[other] |= bit
+            if not new_domains[other]:
+                return new_domains, new_covered, new_pruned, new_pruned[other]
+        cell = self.conflicts.uncoverable_cell(
+            new_domains, remaining_colors, ~new_covered
+        )
+        if cell != -1:
+            return (
+                new_domains,
+                new_covered,
+                new_pruned,
+                self.coverage_conflict(cell, index, new_pruned),
+            )
+        return new_domains, new_covered, new_pruned, 0
+
+    # Trả về (tìm thấy?, tập xung đột). values giới hạn các giá trị được thử ở
+    # mức này (theo thứ tự cho trước); khi đó không ghi nogood cho mức này vì
+    # các giá trị còn lại chưa được xét. Nếu cancel (một Event) được đặt thì
+    # dừng và trả về tập xung đột rỗng để mọi mức phía trên thoát ngay.
+    def search(self, index, domains, covered, pruned, values=None):
+        if index == len(self.colors):
+            return covered == self.full, (1 << index) - 1
+        self.nodes_expanded += 1
+        self.max_depth = max(self.max_depth, index)
+        if self.cancel is not None and self.cancel.is_set():
+            return False, 0
+
+        color = self.colors[index]
+        bit = 1 << index
+        remaining_colors = self.colors[index + 1 :]
+        conflict = pruned[color]  # Các mức đã thu hẹp miền của biến này
+        restricted = values is not None
+        if values is None:
+            values = order_paths(color, domains, remaining_colors, self.conflicts)
+
+        for i in values:
+            path = self.conflicts.paths[color][i]
+            self.nodes_generated += 1
+            if self.nogoods is not None:
+                rest = self.nogoods.match(color, path, self.assignments)
+                if rest is not None:
+                    self.nogood_hits += 1
+                    for other, _ in rest:
+                        conflict |= 1 << self.colors.index(other)
+                    continue
+
+            new_domains, new_covered, new_pruned, failure = self.assign(
+                index, i, domains, covered, pruned
+            )
+            if failure:
+                conflict |= failure & ~bit
+                continue
 
-    return False
+            self.assignments[color] = path
+            new_domains[color] = 1 << i  # fix current
+            found, child_conflict = self.search(
+                index + 1, new_domains, new_covered, new_pruned
+            )
+            if found:
+                return True, 0
+            del self.assignments[color]
+            if not child_conflict & bit:
+                self.backjumps += 1
+                return False, child_conflict
+            conflict |= child_conflict & ~bit
+
+        # Mọi giá trị đều thất bại: ghi nhớ tổ hợp gán gây ra xung đột
+        if self.nogoods is not None and conflict and not restricted:
+            self.nogoods.add(
+                [
+                    (self.colors[level], self.assignments[self.colors[level]])
+                    for level in iter_ids(conflict)
+                ]
+            )
+        return False, conflict
 
 
 def direction_from(p1, p2):
@@ -149,31 +372,119 @@ def convert_paths_to_moves(assignments):
     return result
 
 
-def solve_csp(start_goals, ROWS, COLS):
-    matrix = [[None for _ in range(COLS)] for _ in range(ROWS)]
-    for color, (start, goal) in start_goals.items():
-        matrix[start[0]][start[1]] = color
-        matrix[goal[0]][goal[1]] = color
-
-    start_time = time.time()
-    domains = {}
-    for color, (start, goal) in start_goals.items():
-        paths = find_all_paths(
-            start, goal, matrix, color, ROWS, COLS, max_length=ROWS * COLS
+# Các giới hạn độ dài đường đi được thử lần lượt. Lời giải phủ kín lưới nên
+# đường dài nhất có ít nhất ROWS * COLS / số màu ô; miền giá trị được sinh theo
+# từng mức và chỉ mở rộng khi mức hiện tại không có lời giải.
+def length_bounds(start_goals, ROWS, COLS, length_step=None):
+    size = ROWS * COLS
+    bound = -(-size // len(start_goals))
+    for start, goal in start_goals.values():
+        bound = max(bound, abs(start[0] - goal[0]) + abs(start[1] - goal[1]) + 1)
+    step = length_step or ROWS
+    while bound < size:
+        yield bound
+        bound += step
+    yield size
+
+
+# Miền giá trị (danh sách bitmask đường đi) của mọi màu ở một giới hạn độ dài
+def path_domains(board, max_length, cancel=None):
+    return {
+        color: list(iter_paths(board, k, max_length, cancel))
+        for k, color in enumerate(board.colors)
+    }
+
+
+engines = ("path", "cell")  # Biến theo màu (miền là đường đi) hoặc theo ô
+
+
+# stats (nếu truyền vào một dict) nhận thêm các bộ đếm của bộ quay lui:
+# số lần nhảy lui, số lần trúng nogood và số nogood đang lưu (engine "cell"
+# không nhảy lui hay lưu nogood nên các bộ đếm này luôn bằng 0).
+# workers khác 1 (None = số CPU): tìm kiếm song song (xem parallel_csp), chỉ
+# với engine "path".
+# cancel: cờ dừng hợp tác (xem registry.CancelToken), kiểm tra ở mỗi node.
+def solve_csp(
+    start_goals,
+    ROWS,
+    COLS,
+    length_step=None,
+    engine="path",
+    nogood_capacity=10000,
+    stats=None,
+    workers=1,
+    cancel=None,
+):
+    if engine not in engines:
+        raise ValueError(f"Unknown CSP engine: {engine!r}")
+    if engine == "cell" and workers != 1:
+        raise ValueError("Cell CSP engine does not support workers")
+    if workers != 1:
+        from solvers.parallel_csp import solve_parallel_csp
+
+        return solve_parallel_csp(
+            start_goals,
+            ROWS,
+            COLS,
+            workers=workers,
+            length_step=length_step,
+            nogood_capacity=nogood_capacity,
+            stats=stats,
+            cancel=cancel,
         )
-        if not paths:
+    start_time = time.time()
+    if stats is None:
+        stats = {}
+    stats.update(backjumps=0, nogood_hits=0, nogoods=0)
+    if engine == "cell":
+        from solvers.csp_cell import solve_cell_csp
+
+        assignments = solve_cell_csp(start_goals, ROWS, COLS, cancel)
+        if assignments is None:
             return None, None, None, None, None
-        domains[color] = paths
+        time_used = time.time() - start_time
+        return convert_paths_to_moves(assignments), time_used, None, None, None
 
+    board = BitBoard(start_goals, ROWS, COLS, propagate=False)
     degrees = compute_degrees(start_goals, ROWS, COLS)
-    colors = order_colors(domains, degrees)
 
-    assignments = {}
-    success = backtrack(assignments, domains, colors, 0, start_goals, ROWS, COLS)
-
-    if success:
-        time_used = time.time() - start_time
-        path = convert_paths_to_moves(assignments)
-        return path, time_used, None, None, None
+    # Khởi tạo các biến đếm
+    nodes_generated = 0
+    nodes_expanded = 0
+    max_depth = 0
+
+    for max_length in length_bounds(start_goals, ROWS, COLS, length_step):
+        paths = path_domains(board, max_length, cancel)
+        if cancel is not None and cancel.is_set():
+            break
+        if not all(paths.values()):
+            if max_length == ROWS * COLS:
+                break  # Có màu không còn đường đi nào => vô nghiệm
+            continue
 
-    return None, None, None, None, None
+        conflicts = ConflictIndex(paths, ROWS * COLS)
+        domains = {color: conflicts.full_domain(color) for color in paths}
+        colors = order_colors(domains, degrees)
+        solver = Backtracker(colors, conflicts, ROWS * COLS, nogood_capacity)
+        solver.cancel = cancel
+        pruned = {color: 0 for color in colors}
+        found, _ = solver.search(0, domains, 0, pruned)
+
+        nodes_generated += solver.nodes_generated
+        nodes_expanded += solver.nodes_expanded
+        max_depth = max(max_depth, solver.max_depth)
+        stats["backjumps"] += solver.backjumps
+        stats["nogood_hits"] += solver.nogood_hits
+        stats["nogoods"] = len(solver.nogoods or ())
+        if found:
+            ordered = {
+                color: mask_to_path(board, board.colors.index(color), mask)
+                for color, mask in solver.assignments.items()
+            }
+            time_used = time.time() - start_time
+            path = convert_paths_to_moves(ordered)
+            return path, time_used, nodes_generated, nodes_expanded, max_depth
+        if cancel is not None and cancel.is_set():
+            break
+
+    return None, None, nodes_generated, nodes_expanded, max_depth
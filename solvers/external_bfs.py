@@ -0,0 +1,311 @@
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from solvers.bfs_solver import (
+    Node,
+    candidate_moves,
+    directions,
+    is_goal,
+    move_flow,
+    propagate_forced,
+    reconstruct_path,
+)
+from solvers.regions import is_dead_state
+
+# Bản ghi trên đĩa của một trạng thái:
+#   [mỗi ô 1 byte: 0 = trống, k + 1 = màu thứ k][mỗi đầu luồng 2 byte]
+#   [chỉ số node cha trong tầng trước: 4 byte][màu: 1 byte][hướng: 1 byte]
+# Các tệp tầng được sắp theo phần trạng thái nên có thể loại trùng bằng trộn.
+edge_format = struct.Struct("<IBB")
+no_parent = 0xFFFFFFFF
+
+
+# Bộ mã hóa trạng thái BFS (ma trận + vị trí đầu luồng) thành bản ghi nhị phân
+class StateCodec:
+    def __init__(self, start_goals, ROWS, COLS):
+        self.ROWS = ROWS
+        self.COLS = COLS
+        self.colors = list(start_goals)
+        self.color_index = {color: k for k, color in enumerate(self.colors)}
+        self.dir_names = list(directions)
+        self.state_size = ROWS * COLS + 2 * len(self.colors)
+        self.record_size = self.state_size + edge_format.size
+
+    # Phần trạng thái của bản ghi: các ô và vị trí đầu luồng
+    def state_bytes(self, node):
+        cells = bytes(
+            0 if cell is None else self.color_index[cell] + 1
+            for row in node.matrix
+            for cell in row
+        )
+        heads = struct.pack(
+            f"<{len(self.colors)}H",
+            *(r * self.COLS + c for r, c in (node.flows[k] for k in self.colors)),
+        )
+        return cells + heads
+
+    def encode(self, node, parent_index, move):
+        if move is None:
+            edge = edge_format.pack(no_parent, 255, 255)
+        else:
+            color, direction = move
+            edge = edge_format.pack(
+                parent_index, self.color_index[color], self.dir_names.index(direction)
+            )
+        return self.state_bytes(node) + edge
+
+    def decode_state(self, record):
+        cells = record[: self.ROWS * self.COLS]
+        matrix = [
+            [
+                None if v == 0 else self.colors[v - 1]
+                for v in cells[r * self.COLS : (r + 1) * self.COLS]
+            ]
+            for r in range(self.ROWS)
+        ]
+        heads = struct.unpack_from(
+            f"<{len(self.colors)}H", record, self.ROWS * self.COLS
+        )
+        flows = {
+            color: divmod(idx, self.COLS) for color, idx in zip(self.colors, heads)
+        }
+        return Node(matrix, flows)
+
+    def decode(self, record):
+        node = self.decode_state(record)
+        node.move = self.decode_move(record)
+        return node
+
+    def decode_move(self, record):
+        _, color, direction = edge_format.unpack_from(record, self.state_size)
+        if color == 255:
+            return None
+        return self.colors[color], self.dir_names[direction]
+
+    def parent_index(self, record):
+        return edge_format.unpack_from(record, self.state_size)[0]
+
+
+# Số nước đi đã thực hiện để tới node: mỗi nước tô thêm một ô, trừ nước cuối cùng
+# đi vào ô đích (đã được tô sẵn) nên được đếm qua số luồng đã tới đích
+def move_count(node, goal_positions):
+    filled = sum(1 for row in node.matrix for cell in row if cell is not None)
+    arrived = sum(
+        1 for color, pos in node.flows.items() if pos == goal_positions[color]
+    )
+    return filled - 2 * len(goal_positions) + arrived
+
+
+# Mở một tệp bản ghi để đọc qua mmap (tệp rỗng trả về b"")
+def open_records(path):
+    if os.path.getsize(path) == 0:
+        return b""
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def iter_records(data, record_size):
+    for offset in range(0, len(data), record_size):
+        yield data[offset : offset + record_size]
+
+
+# Bỏ các bản ghi trùng trạng thái với nhau hoặc với các tầng trước.
+# records và mọi tầng trước đều đã được sắp theo trạng thái => chỉ cần trộn tuyến tính.
+def drop_duplicates(records, previous_levels, codec):
+    size = codec.state_size
+    cursors = [iter_records(level, codec.record_size) for level in previous_levels]
+    heads = [next(cursor, None) for cursor in cursors]
+    last_state = None
+    for record in records:
+        state = record[:size]
+        if state == last_state:
+            continue
+        last_state = state
+        seen = False
+        for j, cursor in enumerate(cursors):
+            while heads[j] is not None and heads[j][:size] < state:
+                heads[j] = next(cursor, None)
+            if heads[j] is not None and heads[j][:size] == state:
+                seen = True
+        if not seen:
+            yield record
+
+
+# Ghi một đoạn bản ghi đã sắp xếp ra tệp tạm
+def write_run(chunk, path, codec):
+    chunk.sort(key=lambda record: record[: codec.state_size])
+    with open(path, "wb") as f:
+        f.writelines(chunk)
+
+
+# Phát lại các nước rẽ nhánh từ gốc (nước bắt buộc được tính lại) để lấy
+# toàn bộ danh sách nước đi
+def replay_moves(start_node, branch_moves, goal_positions, ROWS, COLS, propagate):
+    node = start_node
+    for color, direction in branch_moves:
+        new_matrix, new_flows = move_flow(node.matrix, node.flows, color, direction)
+        node = Node(new_matrix, new_flows, parent=node, move=(color, direction))
+        if propagate:
+            propagate_forced(node, goal_positions, ROWS, COLS)
+    return reconstruct_path(node)
+
+
+# Dựng lại đường đi: lần ngược chỉ số cha qua các tệp tầng rồi phát lại
+def rebuild_path(levels, level, index, codec, start_node, goal_positions, propagate):
+    branch_moves = []
+    while level > 0:
+        data = levels[level]
+        record = data[index * codec.record_size : (index + 1) * codec.record_size]
+        branch_moves.append(codec.decode_move(record))
+        index = codec.parent_index(record)
+        level -= 1
+    branch_moves.reverse()
+    return replay_moves(
+        start_node, branch_moves, goal_positions, codec.ROWS, codec.COLS, propagate
+    )
+
+
+# Sắp xếp các node con của một tầng theo đoạn, trộn và loại trùng rồi ghi ra
+# tệp tầng mới; trả về số bản ghi đã ghi
+def write_level(chunk, runs, levels, level_path, tmp, codec):
+    if chunk:
+        runs.append(os.path.join(tmp, f"run{len(runs)}.bin"))
+        write_run(chunk, runs[-1], codec)
+    run_data = [open_records(run) for run in runs]
+    merged = heapq.merge(
+        *(iter_records(data, codec.record_size) for data in run_data),
+        key=lambda record: record[: codec.state_size],
+    )
+    written = 0
+    with open(level_path, "wb") as f:
+        for record in drop_duplicates(merged, levels, codec):
+            f.write(record)
+            written += 1
+    for data in run_data:
+        if data:
+            data.close()
+    for run in runs:
+        os.remove(run)
+    return written
+
+
+# BFS bộ nhớ ngoài: mỗi tầng của frontier được ghi ra một tệp nhị phân gọn và
+# đọc lại qua mmap; trạng thái trùng được loại bằng sắp xếp theo đoạn
+# (chunk_size bản ghi trong RAM) rồi trộn với các tầng trước. Thay cho con trỏ
+# cha, mỗi bản ghi lưu chỉ số cha và nước rẽ nhánh để dựng lại đường đi.
+# stats (nếu truyền vào một dict) nhận exhausted = True khi dừng vì max_nodes.
+def solve_bfs_external(
+    start_goals,
+    ROWS,
+    COLS,
+    max_nodes=1000000,
+    propagate=True,
+    partial_order=False,
+    chunk_size=100000,
+    workdir=None,
+    stats=None,
+    cancel=None,
+):
+    start_time = time.time()
+    if stats is None:
+        stats = {}
+    stats.update(exhausted=False)
+    codec = StateCodec(start_goals, ROWS, COLS)
+    matrix = [[None for _ in range(COLS)] for _ in range(ROWS)]  # Ma trận ban đầu
+    flows = {}  # Vị trí hiện tại của từng luồng màu
+    goal_positions = {}  # Vị trí mục tiêu của từng luồng màu
+    for color, (start, goal) in start_goals.items():
+        matrix[start[0]][start[1]] = color
+        matrix[goal[0]][goal[1]] = color
+        flows[color] = start
+        goal_positions[color] = goal
+
+    start_node = Node(matrix, flows)
+    if propagate:
+        propagate_forced(start_node, goal_positions, ROWS, COLS)
+
+    # Khởi tạo các biến đếm
+    nodes_generated = 1
+    nodes_expanded = 0
+    max_depth = move_count(start_node, goal_positions)
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        level_path = os.path.join(tmp, "level0.bin")
+        with open(level_path, "wb") as f:
+            f.write(codec.encode(start_node, 0, None))
+        levels = [open_records(level_path)]
+
+        try:
+            while levels[-1]:
+                depth = len(levels) - 1
+                runs = []  # Các đoạn node con đã sắp xếp của tầng tiếp theo
+                chunk = []
+
+                for index, record in enumerate(
+                    iter_records(levels[-1], codec.record_size)
+                ):
+                    if nodes_expanded >= max_nodes:
+                        print(f"BFS: Vượt quá giới hạn mở rộng {max_nodes} node.")
+                        stats["exhausted"] = True
+                        return None, None, nodes_generated, nodes_expanded, max_depth
+                    if cancel is not None and cancel.is_set():
+                        return None, None, nodes_generated, nodes_expanded, max_depth
+
+                    node = codec.decode(record)
+                    nodes_expanded += 1
+
+                    if is_goal(node, start_goals):
+                        path = rebuild_path(
+                            levels,
+                            depth,
+                            index,
+                            codec,
+                            start_node,
+                            goal_positions,
+                            propagate,
+                        )
+                        time_used = time.time() - start_time
+                        return (
+                            path,
+                            time_used,
+                            nodes_generated,
+                            nodes_expanded,
+                            max_depth,
+                        )
+
+                    for color, dir_name, _, _, _ in candidate_moves(
+                        node, start_goals, goal_positions, ROWS, COLS, partial_order
+                    ):
+                        new_matrix, new_flows = move_flow(
+                            node.matrix, node.flows, color, dir_name
+                        )
+                        child = Node(new_matrix, new_flows, move=(color, dir_name))
+                        if propagate:
+                            propagate_forced(child, goal_positions, ROWS, COLS)
+                        if is_dead_state(
+                            child.matrix, child.flows, goal_positions, ROWS, COLS
+                        ):
+                            continue
+                        max_depth = max(max_depth, move_count(child, goal_positions))
+                        chunk.append(codec.encode(child, index, child.move))
+                        if len(chunk) >= chunk_size:
+                            runs.append(os.path.join(tmp, f"run{len(runs)}.bin"))
+                            write_run(chunk, runs[-1], codec)
+                            chunk = []
+
+                # Trộn các đoạn, loại trùng với nhau và với các tầng trước
+                level_path = os.path.join(tmp, f"level{depth + 1}.bin")
+                nodes_generated += write_level(
+                    chunk, runs, levels, level_path, tmp, codec
+                )
+                levels.append(open_records(level_path))
+        finally:
+            for data in levels:
+                if data:
+                    data.close()
+
+    return None, None, nodes_generated, nodes_expanded, max_depth
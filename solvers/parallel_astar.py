@@ -0,0 +1,216 @@
+import heapq
+import multiprocessing as mp
+import os
+import queue
+import time
+
+from solvers.astar_solver import make_board
+from solvers.zobrist import TranspositionTable
+
+
+# Các cờ điều khiển dùng chung giữa các tiến trình: bộ đếm lô tin nhắn đã gửi /
+# đã nhận và cờ rảnh của từng worker, tất cả được cập nhật dưới cùng một khóa.
+# Khi mọi worker đều rảnh và số lô đã gửi bằng số lô đã nhận thì không còn việc
+# nào đang chạy hay đang trên đường truyền => kết thúc (không có lời giải).
+class Termination:
+    def __init__(self, workers):
+        self.lock = mp.Lock()
+        self.sent = mp.Value("q", 0, lock=False)
+        self.received = mp.Value("q", 0, lock=False)
+        self.idle = mp.Array("b", [1] * workers, lock=False)
+        self.stop = mp.Event()
+
+    def on_send(self):
+        with self.lock:
+            self.sent.value += 1
+
+    def on_receive(self, worker_id):
+        with self.lock:
+            self.received.value += 1
+            self.idle[worker_id] = 0
+
+    def on_idle(self, worker_id):
+        with self.lock:
+            self.idle[worker_id] = 1
+            if all(self.idle) and self.sent.value == self.received.value:
+                self.stop.set()
+
+
+# Gửi các lô node đang chờ trong hộp thư đi tới worker sở hữu chúng
+def flush(outboxes, inboxes, termination, min_size=1):
+    for owner, batch in enumerate(outboxes):
+        if len(batch) >= min_size:
+            termination.on_send()
+            inboxes[owner].put(batch)
+            outboxes[owner] = []
+
+
+# Vòng lặp của một worker HDA*: giữ danh sách mở và bảng chuyển vị riêng cho các
+# trạng thái có khóa Zobrist thuộc về nó (key % workers == worker_id).
+# Mỗi phần tử trong danh sách mở là (f, thứ tự, các nước đi từ gốc, node).
+def hda_worker(
+    worker_id, board, inboxes, results, termination, batch_size, flush_every
+):
+    workers = len(inboxes)
+    inbox = inboxes[worker_id]
+    outboxes = [[] for _ in range(workers)]
+    open_list = []
+    state_cost = TranspositionTable()
+    counter = 0  # Thứ tự chèn, giúp so sánh ổn định khi f bằng nhau
+
+    # Khởi tạo các biến đếm
+    nodes_generated = 0
+    nodes_expanded = 0
+    max_depth = 0
+
+    while not termination.stop.is_set():
+        # Nhận các lô node từ worker khác
+        if open_list:
+            try:
+                batch = inbox.get_nowait()
+            except queue.Empty:
+                batch = None
+        else:
+            flush(outboxes, inboxes, termination)
+            termination.on_idle(worker_id)
+            try:
+                batch = inbox.get(timeout=0.01)
+            except queue.Empty:
+                continue
+        if batch is not None:
+            termination.on_receive(worker_id)
+            for f, moves, node in batch:
+                counter += 1
+                heapq.heappush(open_list, (f, counter, moves, node))
+            continue
+
+        f, _, moves, current = heapq.heappop(open_list)
+        nodes_expanded += 1
+        max_depth = max(max_depth, current.cost)
+
+        # Kiểm tra đã đến đích chưa?
+        if board.is_goal(current):
+            results.put(("solution", list(moves)))
+            termination.stop.set()
+            break
+
+        current_state = board.encode_state(current)
+        known_cost = state_cost.get(current_state)
+        if known_cost is not None and known_cost <= current.cost:
+            continue
+        state_cost.store(current_state, current.cost)
+
+        for child in board.generate_successors(current):
+            nodes_generated += 1
+            child_moves = moves + (child.move,) + tuple(child.forced)
+            # Cắt liên kết cha: đường đi được mang theo trong child_moves
+            child.parent = None
+            child.move = None
+            child.forced = []
+            child.f = child.cost + board.heuristic(child)
+            owner = board.encode_state(child) % workers
+            if owner == worker_id:
+                counter += 1
+                heapq.heappush(open_list, (child.f, counter, child_moves, child))
+            else:
+                outboxes[owner].append((child.f, child_moves, child))
+
+        # Gửi theo lô để giảm chi phí liên lạc giữa các tiến trình
+        flush(outboxes, inboxes, termination, min_size=batch_size)
+        if nodes_expanded % flush_every == 0:
+            flush(outboxes, inboxes, termination)
+
+    results.put(("stats", nodes_generated, nodes_expanded, max_depth))
+
+
+# A* song song kiểu HDA* (Hash Distributed A*): mỗi trạng thái được gửi tới
+# worker sở hữu khóa băm của nó, mỗi worker có danh sách mở riêng nên việc phát
+# hiện trạng thái trùng không cần đồng bộ. Chạy trên nhiều tiến trình nên không
+# bị giới hạn bởi GIL. cancel: cờ dừng của tiến trình chính, kiểm tra mỗi poll
+# giây khi chờ kết quả và được chuyển tới các worker qua termination.stop.
+# Worker thoát bất thường khi chưa tìm thấy lời giải gây ra RuntimeError.
+def solve_parallel_astar(
+    start_goals,
+    ROWS,
+    COLS,
+    workers=None,
+    engine="bitboard",
+    propagate=True,
+    batch_size=32,
+    flush_every=16,
+    cancel=None,
+    poll=0.1,
+    join_timeout=1.0,
+):
+    start_time = time.time()
+    workers = workers or os.cpu_count() or 1
+    board = make_board(engine, start_goals, ROWS, COLS, propagate=propagate)
+    start_node = board.initial_node()
+    root_moves = tuple(start_node.forced)
+    if board.is_goal(start_node):
+        return list(root_moves), time.time() - start_time, 0, 1, start_node.cost
+
+    start_node.forced = []
+    start_node.f = start_node.cost + board.heuristic(start_node)
+    inboxes = [mp.Queue() for _ in range(workers)]
+    results = mp.Queue()
+    termination = Termination(workers)
+
+    # Gửi node gốc tới worker sở hữu nó
+    termination.on_send()
+    owner = board.encode_state(start_node) % workers
+    inboxes[owner].put([(start_node.f, root_moves, start_node)])
+
+    processes = [
+        mp.Process(
+            target=hda_worker,
+            args=(i, board, inboxes, results, termination, batch_size, flush_every),
+            daemon=True,
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    # Thu lời giải (nếu có) và thống kê của từng worker
+    path = None
+    nodes_generated = 0
+    nodes_expanded = 0
+    max_depth = 0
+    stats_received = 0
+    while stats_received < workers:
+        try:
+            message = results.get(timeout=poll)
+        except queue.Empty:
+            if cancel is not None and cancel.is_set():
+                termination.stop.set()
+            if not any(process.is_alive() for process in processes):
+                break  # Worker đã thoát mà không gửi thống kê (bị lỗi)
+            continue
+        if message[0] == "solution":
+            if path is None:
+                path = message[1]
+                time_used = time.time() - start_time
+        else:
+            _, generated, expanded, depth = message
+            nodes_generated += generated
+            nodes_expanded += expanded
+            max_depth = max(max_depth, depth)
+            stats_received += 1
+
+    # Chờ các worker thoát trong cùng một thời hạn rồi dừng hẳn những worker còn lại
+    deadline = time.monotonic() + join_timeout
+    for process in processes:
+        process.join(timeout=max(0, deadline - time.monotonic()))
+    failed = [process.exitcode for process in processes if process.exitcode]
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+    if path is None:
+        # Worker chết giữa chừng thì phần không gian của nó chưa được duyệt hết,
+        # không được báo là vô nghiệm
+        if failed or stats_received < workers:
+            raise RuntimeError(f"Parallel A* worker failed (exit codes {failed})")
+        return None, None, nodes_generated, nodes_expanded, max_depth
+    return path, time_used, nodes_generated, nodes_expanded, max_depth
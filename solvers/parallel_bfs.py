@@ -0,0 +1,206 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+from solvers.bfs_solver import (
+    Node,
+    candidate_moves,
+    is_goal,
+    move_flow,
+    propagate_forced,
+)
+from solvers.external_bfs import StateCodec, replay_moves
+from solvers.regions import is_dead_state
+from solvers.zobrist import TranspositionTable, ZobristHasher
+
+worker_context = {}  # Dữ liệu bài toán của từng tiến trình worker
+
+
+# Dữ liệu dùng chung để mở rộng node của một bài toán
+def make_context(start_goals, ROWS, COLS, propagate, partial_order):
+    return dict(
+        start_goals=start_goals,
+        ROWS=ROWS,
+        COLS=COLS,
+        propagate=propagate,
+        partial_order=partial_order,
+        goals={color: goal for color, (_, goal) in start_goals.items()},
+        codec=StateCodec(start_goals, ROWS, COLS),
+        hasher=ZobristHasher(list(start_goals), ROWS, COLS),
+    )
+
+
+# Khởi tạo dữ liệu cho worker (gọi một lần khi tiến trình worker khởi động)
+def init_worker(start_goals, ROWS, COLS, propagate, partial_order):
+    worker_context.update(
+        make_context(start_goals, ROWS, COLS, propagate, partial_order)
+    )
+
+
+# Mở rộng một đoạn của tầng hiện tại. Với mỗi node trả về (là đích?, các con),
+# mỗi con là (khóa trước lan truyền, khóa sau lan truyền hoặc None,
+# trạng thái nén hoặc None nếu bế tắc, nước rẽ nhánh, độ sâu).
+# ctx: dữ liệu bài toán (make_context); mặc định là worker_context của worker.
+def expand_chunk(chunk, ctx=None):
+    if ctx is None:
+        ctx = worker_context
+    ROWS, COLS = ctx["ROWS"], ctx["COLS"]
+    goals, codec, hasher = ctx["goals"], ctx["codec"], ctx["hasher"]
+    results = []
+    for state, key, depth, move in chunk:
+        node = codec.decode_state(state)
+        node.key, node.depth, node.move = key, depth, move
+        if is_goal(node, ctx["start_goals"]):
+            results.append((True, []))
+            continue
+
+        children = []
+        for color, dir_name, (r, c), (nr, nc), target in candidate_moves(
+            node, ctx["start_goals"], goals, ROWS, COLS, ctx["partial_order"]
+        ):
+            pre_key = hasher.move(
+                key,
+                hasher.color_index[color],
+                hasher.index((r, c)),
+                hasher.index((nr, nc)),
+                fill=target is None,
+            )
+            new_matrix, new_flows = move_flow(node.matrix, node.flows, color, dir_name)
+            child = Node(new_matrix, new_flows, move=(color, dir_name), depth=depth + 1)
+            child.key = pre_key
+            post_key = None
+            if ctx["propagate"]:
+                propagate_forced(child, goals, ROWS, COLS, hasher)
+                if child.forced:
+                    post_key = child.key
+            packed = None
+            if not is_dead_state(child.matrix, child.flows, goals, ROWS, COLS):
+                packed = codec.state_bytes(child)
+            children.append((pre_key, post_key, packed, child.move, child.depth))
+        results.append((False, children))
+    return results
+
+
+# Chia danh sách thành tối đa parts đoạn liên tiếp (giữ nguyên thứ tự)
+def split_chunks(items, parts):
+    size = max(1, -(-len(items) // parts))
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+# BFS song song đồng bộ theo tầng: mỗi tầng được chia thành các đoạn cho các
+# tiến trình worker sinh node con và trả về khóa Zobrist cùng trạng thái nén;
+# tiến trình chính loại trùng với visited theo đúng thứ tự của solve_bfs nên
+# lời giải và các bộ đếm trùng khớp với bản tuần tự.
+# Các tầng nhỏ hơn min_parallel node được mở rộng ngay trong tiến trình chính;
+# với workers <= 1 mọi tầng đều vậy và không tạo tiến trình worker nào.
+# stats (nếu truyền vào một dict) nhận exhausted = True khi dừng vì max_nodes.
+# cancel: cờ dừng hợp tác (xem registry.CancelToken), kiểm tra ở mỗi tầng.
+def solve_parallel_bfs(
+    start_goals,
+    ROWS,
+    COLS,
+    max_nodes=1000000,
+    tt_capacity=None,
+    propagate=True,
+    partial_order=False,
+    workers=None,
+    min_parallel=64,
+    stats=None,
+    cancel=None,
+):
+    start_time = time.time()
+    if stats is None:
+        stats = {}
+    stats.update(exhausted=False)
+    workers = workers or os.cpu_count() or 1
+    config = (start_goals, ROWS, COLS, propagate, partial_order)
+    # Dữ liệu riêng của lần gọi này; worker_context chỉ dùng trong worker nên
+    # các lần gọi đồng thời trong cùng tiến trình không ghi đè lên nhau
+    context = make_context(*config)
+    codec = context["codec"]
+    hasher = context["hasher"]
+    goal_positions = context["goals"]
+
+    # Khởi tạo node bắt đầu giống solve_bfs
+    matrix = [[None for _ in range(COLS)] for _ in range(ROWS)]
+    flows = {}
+    for color, (start, goal) in start_goals.items():
+        matrix[start[0]][start[1]] = color
+        matrix[goal[0]][goal[1]] = color
+        flows[color] = start
+    start_node = Node(matrix, flows)
+    start_node.key = hasher.hash_state(matrix, flows)
+    if propagate:
+        propagate_forced(start_node, goal_positions, ROWS, COLS, hasher)
+    visited = TranspositionTable(tt_capacity)
+    visited.store(start_node.key, start_node.depth)
+
+    # Tầng hiện tại: (trạng thái nén, khóa, độ sâu, nước rẽ nhánh)
+    level = [(codec.state_bytes(start_node), start_node.key, start_node.depth, None)]
+    parents = [[None]]  # parents[L][i] = (chỉ số cha ở tầng L - 1, nước rẽ nhánh)
+
+    # Khởi tạo các biến đếm
+    nodes_generated = 1
+    nodes_expanded = 0
+    max_depth = start_node.depth
+
+    if workers > 1:
+        pool = ProcessPoolExecutor(workers, initializer=init_worker, initargs=config)
+    else:
+        pool = nullcontext()
+    with pool:
+        while level:
+            if cancel is not None and cancel.is_set():
+                break
+            if len(level) < min_parallel or workers <= 1:
+                level_results = expand_chunk(level, context)
+            else:
+                level_results = []
+                for part in pool.map(expand_chunk, split_chunks(level, workers * 4)):
+                    level_results.extend(part)
+
+            # Trộn kết quả theo đúng thứ tự hàng đợi của BFS tuần tự
+            next_level = []
+            next_parents = []
+            for index, (goal_found, children) in enumerate(level_results):
+                if nodes_expanded >= max_nodes:
+                    print(f"BFS: Vượt quá giới hạn mở rộng {max_nodes} node.")
+                    stats["exhausted"] = True
+                    return None, None, nodes_generated, nodes_expanded, max_depth
+                nodes_expanded += 1
+
+                if goal_found:
+                    branch_moves = []
+                    depth = len(parents) - 1
+                    while depth > 0:
+                        index, move = parents[depth][index]
+                        branch_moves.append(move)
+                        depth -= 1
+                    branch_moves.reverse()
+                    path = replay_moves(
+                        start_node, branch_moves, goal_positions, ROWS, COLS, propagate
+                    )
+                    time_used = time.time() - start_time
+                    return path, time_used, nodes_generated, nodes_expanded, max_depth
+
+                for pre_key, post_key, packed, move, depth in children:
+                    if pre_key in visited:
+                        continue
+                    visited.store(pre_key, level[index][2] + 1)
+                    if post_key is not None:
+                        if post_key in visited:
+                            continue
+                        visited.store(post_key, depth)
+                    if packed is None:
+                        continue
+                    max_depth = max(max_depth, depth)
+                    key = pre_key if post_key is None else post_key
+                    next_level.append((packed, key, depth, move))
+                    next_parents.append((index, move))
+                    nodes_generated += 1
+
+            level = next_level
+            parents.append(next_parents)
+
+    return None, None, nodes_generated, nodes_expanded, max_depth
@@ -0,0 +1,217 @@
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from solvers.bitboard import BitBoard
+from solvers.csp_solver import (
+    Backtracker,
+    ConflictIndex,
+    compute_degrees,
+    convert_paths_to_moves,
+    length_bounds,
+    mask_to_path,
+    order_colors,
+    order_paths,
+    path_domains,
+)
+
+worker_context = {}  # Dữ liệu bài toán của từng tiến trình worker
+
+
+# Khởi tạo dữ liệu dùng chung cho worker (gọi một lần khi tiến trình khởi động)
+def init_worker(paths, colors, size, nogood_capacity, stop):
+    worker_context.update(
+        conflicts=ConflictIndex(paths, size),
+        colors=colors,
+        size=size,
+        nogood_capacity=nogood_capacity,
+        stop=stop,
+    )
+
+
+# Trạng thái gốc: miền đầy đủ, chưa phủ ô nào, chưa mức nào thu hẹp miền
+def root_state(conflicts, colors):
+    domains = {color: conflicts.full_domain(color) for color in colors}
+    return domains, 0, {color: 0 for color in colors}
+
+
+# Tìm kiếm một cây con. Mỗi việc là (tiền tố, values): tiền tố là các số hiệu
+# đường đi đã gán cho những biến đầu tiên, values là các giá trị được thử ở mức
+# kế tiếp (None = toàn bộ miền). Khi đã mở rộng quá budget node mà còn giá trị
+# chưa thử, phần còn lại được trả về tiến trình chính để worker rảnh lấy đi.
+# Trả về (trạng thái, dữ liệu, bộ đếm) với trạng thái "solution" | "split" | "done".
+def run_subtree(task, budget):
+    prefix, values = task
+    ctx = worker_context
+    conflicts, colors = ctx["conflicts"], ctx["colors"]
+    solver = Backtracker(colors, conflicts, ctx["size"], ctx["nogood_capacity"])
+    solver.cancel = ctx["stop"]
+
+    # Phát lại tiền tố (đã được tiến trình chính kiểm tra là nhất quán)
+    domains, covered, pruned = root_state(conflicts, colors)
+    for index, i in enumerate(prefix):
+        domains, covered, pruned, _ = solver.assign(
+            index, i, domains, covered, pruned
+        )
+        domains[colors[index]] = 1 << i
+        solver.assignments[colors[index]] = conflicts.paths[colors[index]][i]
+
+    index = len(prefix)
+    if values is None:
+        values = order_paths(colors[index], domains, colors[index + 1 :], conflicts)
+    status, payload = "done", None
+    for position, i in enumerate(values):
+        found, _ = solver.search(index, domains, covered, pruned, [i])
+        if found:
+            status, payload = "solution", dict(solver.assignments)
+            break
+        if solver.cancel.is_set():
+            break
+        rest = values[position + 1 :]
+        if rest and solver.nodes_expanded >= budget:
+            half = (len(rest) + 1) // 2
+            status = "split"
+            payload = [(prefix, rest[:half]), (prefix, rest[half:])]
+            break
+
+    counters = (
+        solver.nodes_generated,
+        solver.nodes_expanded,
+        solver.max_depth,
+        solver.backjumps,
+        solver.nogood_hits,
+        len(solver.nogoods or ()),
+    )
+    return status, payload, counters
+
+
+# Liệt kê các tiền tố nhất quán dài split_depth theo thứ tự LCV
+def split_prefixes(solver, colors, split_depth):
+    conflicts = solver.conflicts
+    depth = min(split_depth, len(colors) - 1)
+    prefixes = []
+
+    def expand(prefix, domains, covered, pruned):
+        index = len(prefix)
+        if index == depth:
+            prefixes.append(tuple(prefix))
+            return
+        color = colors[index]
+        for i in order_paths(color, domains, colors[index + 1 :], conflicts):
+            new_domains, new_covered, new_pruned, failure = solver.assign(
+                index, i, domains, covered, pruned
+            )
+            if failure:
+                continue
+            new_domains[color] = 1 << i
+            expand(prefix + [i], new_domains, new_covered, new_pruned)
+
+    expand([], *root_state(conflicts, colors))
+    return prefixes
+
+
+# CSP song song: cây tìm kiếm được cắt ở split_depth biến đầu tiên theo
+# order_colors, mỗi tiền tố là một việc cho ProcessPoolExecutor. Việc nào chạy
+# quá budget node thì trả phần giá trị chưa thử về hàng đợi chung để worker rảnh
+# lấy đi; khi một worker tìm thấy lời giải, các việc còn lại bị hủy.
+# stats nhận các bộ đếm như solve_csp (nogoods: tổng số nogood các việc của giới
+# hạn độ dài cuối cùng đã lưu) cùng số việc và số lần chia việc.
+# cancel: cờ dừng của tiến trình chính, kiểm tra mỗi poll giây khi chờ worker.
+def solve_parallel_csp(
+    start_goals,
+    ROWS,
+    COLS,
+    workers=None,
+    split_depth=2,
+    budget=2000,
+    length_step=None,
+    nogood_capacity=10000,
+    stats=None,
+    cancel=None,
+    poll=0.1,
+):
+    start_time = time.time()
+    workers = workers or os.cpu_count() or 1
+    board = BitBoard(start_goals, ROWS, COLS, propagate=False)
+    degrees = compute_degrees(start_goals, ROWS, COLS)
+    if stats is None:
+        stats = {}
+    stats.update(backjumps=0, nogood_hits=0, nogoods=0, tasks=0, splits=0)
+
+    # Khởi tạo các biến đếm
+    nodes_generated = 0
+    nodes_expanded = 0
+    max_depth = 0
+
+    for max_length in length_bounds(start_goals, ROWS, COLS, length_step):
+        paths = path_domains(board, max_length, cancel)
+        if cancel is not None and cancel.is_set():
+            break
+        if not all(paths.values()):
+            if max_length == ROWS * COLS:
+                break  # Có màu không còn đường đi nào => vô nghiệm
+            continue
+
+        conflicts = ConflictIndex(paths, ROWS * COLS)
+        domains = {color: conflicts.full_domain(color) for color in paths}
+        colors = order_colors(domains, degrees)
+        prefixes = split_prefixes(
+            Backtracker(colors, conflicts, ROWS * COLS), colors, split_depth
+        )
+
+        solution = None
+        stats["nogoods"] = 0
+        stop = mp.Event()  # Báo các worker của giới hạn độ dài này dừng lại
+        initargs = (paths, colors, ROWS * COLS, nogood_capacity, stop)
+        with ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=initargs
+        ) as pool:
+            pending = {
+                pool.submit(run_subtree, (prefix, None), budget) for prefix in prefixes
+            }
+            stats["tasks"] += len(pending)
+            while pending and solution is None:
+                if cancel is not None and cancel.is_set():
+                    break  # Cờ dừng của tiến trình chính: stop được đặt bên dưới
+                done, pending = wait(
+                    pending,
+                    timeout=None if cancel is None else poll,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    status, payload, counters = future.result()
+                    generated, expanded, depth, backjumps, nogood_hits, nogoods = (
+                        counters
+                    )
+                    nodes_generated += generated
+                    nodes_expanded += expanded
+                    max_depth = max(max_depth, depth)
+                    stats["backjumps"] += backjumps
+                    stats["nogood_hits"] += nogood_hits
+                    stats["nogoods"] += nogoods
+                    if status == "solution" and solution is None:
+                        solution = payload
+                    elif status == "split":
+                        stats["splits"] += 1
+                        stats["tasks"] += len(payload)
+                        for task in payload:
+                            pending.add(pool.submit(run_subtree, task, budget))
+
+            # Hủy các việc chưa chạy và báo các worker đang chạy dừng lại
+            stop.set()
+            for future in pending:
+                future.cancel()
+
+        if solution is not None:
+            ordered = {
+                color: mask_to_path(board, board.colors.index(color), mask)
+                for color, mask in solution.items()
+            }
+            time_used = time.time() - start_time
+            path = convert_paths_to_moves(ordered)
+            return path, time_used, nodes_generated, nodes_expanded, max_depth
+        if cancel is not None and cancel.is_set():
+            break
+
+    return None, None, nodes_generated, nodes_expanded, max_depth
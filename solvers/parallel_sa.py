@@ -0,0 +1,166 @@
+import math
+import multiprocessing as mp
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from solvers.sa_solver import (
+    OperatorSelector,
+    PathState,
+    anneal_step,
+    calibrate_temperature,
+    convert_to_moves,
+    initial_assignment,
+    operators,
+    remember_partial,
+)
+
+worker_context = {}  # Dữ liệu bài toán của từng tiến trình worker
+
+
+def init_worker(start_goals, ROWS, COLS, moves, stop):
+    worker_context.update(
+        start_goals=start_goals, ROWS=ROWS, COLS=COLS, moves=moves, stop=stop
+    )
+
+
+def run_chain(paths, T, sweep, rng_state, scores, check_every=64):
+    """Chạy một chuỗi SA sweep bước ở nhiệt độ cố định T. Bộ sinh số ngẫu nhiên
+    và điểm của các toán tử được truyền qua lại giữa các vòng để mỗi chuỗi giữ
+    dòng ngẫu nhiên riêng. Dừng sớm khi đạt cost 0 hoặc khi có chuỗi khác đã
+    giải xong. Trả về (paths, cost, trạng thái rng, điểm toán tử)"""
+    ctx = worker_context
+    start_goals, ROWS, COLS = ctx["start_goals"], ctx["ROWS"], ctx["COLS"]
+    rng = random.Random()
+    rng.setstate(rng_state)
+    state = PathState(paths, ROWS, COLS)
+    selector = OperatorSelector(ctx["moves"] or operators, rng)
+    selector.scores.update(scores)
+
+    for step in range(sweep):
+        anneal_step(state, selector, T, start_goals, ROWS, COLS, rng)
+        if state.cost == 0:
+            ctx["stop"].set()
+            break
+        if step % check_every == 0 and ctx["stop"].is_set():
+            break
+    return state.paths, state.cost, rng.getstate(), selector.scores
+
+
+def temperature_ladder(Tmin, Tmax, chains):
+    """Các nhiệt độ cách đều theo thang log từ Tmin tới Tmax"""
+    if chains == 1:
+        return [Tmin]
+    ratio = Tmax / Tmin
+    return [Tmin * ratio ** (i / (chains - 1)) for i in range(chains)]
+
+
+def solve_parallel_sa(
+    start_goals,
+    ROWS,
+    COLS,
+    Tmax=None,
+    Tmin=0.005,
+    sweep=1500,
+    rounds=200,
+    chains=None,
+    moves=None,
+    seed=None,
+    workers=None,
+    warm_start="random",
+    stats=None,
+    cancel=None,
+    poll=0.1,
+    check_every=64,
+):
+    """Parallel tempering: mỗi chuỗi chạy ở một nhiệt độ cố định trên thang
+    temperature_ladder, các chuỗi chạy song song trong ProcessPoolExecutor.
+    Sau mỗi vòng sweep bước, các cặp nhiệt độ kề nhau được đổi trạng thái với
+    xác suất min(1, exp((1/Ti - 1/Tj) * (Ei - Ej))). Khi Tmin == Tmax đây là
+    SA nhiều điểm xuất phát độc lập. Mọi chuỗi dừng ngay khi một chuỗi đạt
+    cost 0. Tmax = None: đỉnh thang nhiệt được ước lượng bằng
+    calibrate_temperature trên trạng thái xuất phát của chuỗi đầu tiên (không
+    thấp hơn Tmin). warm_start: trạng thái xuất phát của các chuỗi (xem
+    sa_solver.initial_assignment); trạng thái tốt nhất của các chuỗi được lưu
+    vào partial_cache như solve_sa. stats (nếu truyền vào một dict) nhận số
+    vòng, số lần đổi, đỉnh thang nhiệt Tmax và exhausted = True khi hết rounds
+    vòng. cancel: cờ dừng của tiến trình chính, kiểm tra mỗi poll giây khi chờ
+    các chuỗi và được chuyển tới chúng qua sự kiện dừng chung; mỗi chuỗi kiểm
+    tra sự kiện đó sau mỗi check_every bước"""
+    start_time = time.time()
+    workers = workers or os.cpu_count() or 1
+    chains = chains or max(workers, 4)
+    master = random.Random(seed)
+    if stats is None:
+        stats = {}
+    stats.update(rounds=0, swaps=0, attempts=0, Tmax=Tmax, exhausted=False)
+
+    # Mỗi chuỗi: trạng thái (paths), trạng thái rng và điểm toán tử riêng
+    replicas = []
+    for _ in range(chains):
+        if cancel is not None and cancel.is_set():
+            return None, None, None, None, None
+        rng = random.Random(master.getrandbits(64))
+        paths = initial_assignment(start_goals, ROWS, COLS, warm_start, rng)
+        if len(paths) < len(start_goals):
+            return None, None, None, None, None
+        replicas.append([paths, rng.getstate(), {}])
+    if Tmax is None:
+        state = PathState(replicas[0][0], ROWS, COLS)
+        selector = OperatorSelector(moves or operators, master)
+        Tmax = calibrate_temperature(
+            state, selector, start_goals, ROWS, COLS, master, cancel=cancel
+        )
+        Tmax = max(Tmax, Tmin)
+        stats["Tmax"] = Tmax
+    ladder = temperature_ladder(Tmin, Tmax, chains)
+    best, best_cost = None, None  # Trạng thái tốt nhất của mọi chuỗi
+
+    stop = mp.Event()
+    initargs = (start_goals, ROWS, COLS, moves, stop)
+    with ProcessPoolExecutor(
+        workers, initializer=init_worker, initargs=initargs
+    ) as pool:
+        for round_index in range(rounds):
+            if cancel is not None and cancel.is_set():
+                break
+            stats["rounds"] += 1
+            futures = [
+                pool.submit(
+                    run_chain, paths, T, sweep, rng_state, scores, check_every
+                )
+                for (paths, rng_state, scores), T in zip(replicas, ladder)
+            ]
+            if cancel is not None:
+                while wait(futures, timeout=poll).not_done:
+                    if cancel.is_set():
+                        stop.set()
+            energies = []
+            for replica, future in zip(replicas, futures):
+                paths, cost, rng_state, scores = future.result()
+                replica[:] = [paths, rng_state, scores]
+                energies.append(cost)
+                if best_cost is None or cost < best_cost:
+                    best, best_cost = paths, cost
+                if cost == 0:
+                    remember_partial(start_goals, ROWS, COLS, paths)
+                    steps = convert_to_moves(paths)
+                    return steps, time.time() - start_time, None, None, None
+
+            # Đổi trạng thái giữa các cặp nhiệt độ kề nhau (xen kẽ cặp chẵn/lẻ)
+            for i in range(round_index % 2, chains - 1, 2):
+                j = i + 1
+                stats["attempts"] += 1
+                beta = 1 / ladder[i] - 1 / ladder[j]
+                exponent = beta * (energies[i] - energies[j])
+                if exponent >= 0 or master.random() < math.exp(exponent):
+                    stats["swaps"] += 1
+                    replicas[i][0], replicas[j][0] = replicas[j][0], replicas[i][0]
+                    energies[i], energies[j] = energies[j], energies[i]
+        else:
+            stats["exhausted"] = True  # Hết rounds vòng mà chưa có lời giải
+
+    if best is not None:
+        remember_partial(start_goals, ROWS, COLS, best)
+    return None, None, None, None, None
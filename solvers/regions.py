@@ -0,0 +1,121 @@
+directions = {
+    "up": (-1, 0),
+    "down": (1, 0),
+    "left": (0, -1),
+    "right": (0, 1),
+}  # Hướng di chuyển trong ma trận
+
+
+# Phân tích các vùng ô trống bằng một lần loang duy nhất.
+# Ô trống là ô chưa có màu và không phải đích của một luồng chưa hoàn thành.
+# Trả về bộ ba:
+#   reachable: {màu: True/False} đầu luồng còn đi tới được đích hay không
+#   stranded: có vùng trống nào mà không luồng nào vào được (chạm cả đầu và đích)
+#   dead_cell: có ô trống nào chỉ còn tối đa một ô kề tự do (ngõ cụt)
+def analyze_regions(matrix, flows, goals, ROWS, COLS):
+    active = {color: pos for color, pos in flows.items() if pos != goals[color]}
+    endpoints = set(active.values())
+    endpoints.update(goals[color] for color in active)
+
+    # Gán nhãn vùng cho từng ô trống, đồng thời kiểm tra ngõ cụt
+    labels = [[-1] * COLS for _ in range(ROWS)]
+    region_count = 0
+    dead_cell = False
+    for r in range(ROWS):
+        for c in range(COLS):
+            if labels[r][c] != -1 or matrix[r][c] is not None or (r, c) in endpoints:
+                continue
+            stack = [(r, c)]
+            labels[r][c] = region_count
+            while stack:
+                cr, cc = stack.pop()
+                free = 0
+                for dr, dc in directions.values():
+                    nr, nc = cr + dr, cc + dc
+                    if not (0 <= nr < ROWS and 0 <= nc < COLS):
+                        continue
+                    if (nr, nc) in endpoints:
+                        free += 1
+                    elif matrix[nr][nc] is None:
+                        free += 1
+                        if labels[nr][nc] == -1:
+                            labels[nr][nc] = region_count
+                            stack.append((nr, nc))
+                if free <= 1:
+                    dead_cell = True
+            region_count += 1
+
+    # Tập nhãn vùng kề với một ô đầu/đích
+    def touching(pos):
+        r, c = pos
+        result = set()
+        for dr, dc in directions.values():
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < ROWS and 0 <= nc < COLS and labels[nr][nc] != -1:
+                result.add(labels[nr][nc])
+        return result
+
+    reachable = {}
+    entered = set()  # Các vùng có ít nhất một luồng đi vào được
+    for color, (r, c) in active.items():
+        gr, gc = goals[color]
+        if matrix[gr][gc] is not None and matrix[gr][gc] != color:
+            reachable[color] = False  # Đích đã bị màu khác chiếm
+            continue
+        shared = touching((r, c)) & touching((gr, gc))
+        entered |= shared
+        reachable[color] = bool(shared) or abs(gr - r) + abs(gc - c) == 1
+    for color in flows:
+        reachable.setdefault(color, True)
+
+    stranded = len(entered) < region_count
+    return reachable, stranded, dead_cell
+
+
+# Trạng thái bị loại nếu có luồng mất đường, vùng bị cô lập hoặc ô ngõ cụt
+def is_dead_state(matrix, flows, goals, ROWS, COLS):
+    reachable, stranded, dead_cell = analyze_regions(matrix, flows, goals, ROWS, COLS)
+    return stranded or dead_cell or not all(reachable.values())
+
+
+# Tìm một nước đi bắt buộc, trả về (màu, hướng) hoặc None nếu không có.
+# Quy tắc 1: đầu luồng chỉ còn đúng một hướng đi hợp lệ.
+# Quy tắc 2: ô trống kề đầu luồng chỉ có đúng hai ô kề tự do (một trong số đó
+# là đầu luồng) nên chỉ luồng này mới có thể lấp được nó.
+def find_forced_move(matrix, flows, goals, ROWS, COLS):
+    active = {color: pos for color, pos in flows.items() if pos != goals[color]}
+    endpoints = set(active.values())
+    endpoints.update(goals[color] for color in active)
+
+    def is_empty(r, c):
+        return matrix[r][c] is None and (r, c) not in endpoints
+
+    def is_own_goal(color, r, c):
+        return (r, c) == goals[color] and matrix[r][c] in (None, color)
+
+    def free_count(r, c):
+        count = 0
+        for dr, dc in directions.values():
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < ROWS and 0 <= nc < COLS:
+                if (nr, nc) in endpoints or matrix[nr][nc] is None:
+                    count += 1
+        return count
+
+    for color, (r, c) in active.items():
+        legal = []
+        for name, (dr, dc) in directions.items():
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < ROWS and 0 <= nc < COLS:
+                if is_empty(nr, nc) or is_own_goal(color, nr, nc):
+                    legal.append(name)
+        if len(legal) == 1:
+            return color, legal[0]
+
+    for color, (r, c) in active.items():
+        for name, (dr, dc) in directions.items():
+            nr, nc = r + dr, c + dc
+            if 0 <= nr < ROWS and 0 <= nc < COLS:
+                if is_empty(nr, nc) and free_count(nr, nc) == 2:
+                    return color, name
+    return None
@@ -0,0 +1,137 @@
+import importlib
+import inspect
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+# Giao thức chung của các bộ giải:
+#   solve(start_goals, ROWS, COLS, cancel=None, **tùy chọn)
+# trả về (path, thời gian, số node sinh, số node mở rộng, độ sâu lớn nhất).
+# cancel là đối tượng có is_set() (CancelToken, threading.Event hoặc
+# multiprocessing.Event) được vòng lặp tìm kiếm kiểm tra định kỳ; khi cờ bật,
+# bộ giải dừng và trả về như khi không tìm thấy lời giải.
+registry = {
+    "A*": ("solvers.astar_solver", "solve_astar"),
+    "BFS": ("solvers.bfs_solver", "solve_bfs"),
+    "CSP": ("solvers.csp_solver", "solve_csp"),
+    "SA": ("solvers.sa_solver", "solve_sa"),
+    "Beam": ("solvers.beam_solver", "solve_beam"),
+    "SAT": ("solvers.sat_solver", "solve_sat"),
+}  # Tên thuật toán -> (module, hàm giải); module chỉ được import khi dùng tới
+
+# "unsolved": bộ giải đã duyệt hết và chứng minh bài toán vô nghiệm.
+# "incomplete": bộ giải dừng vì hết giới hạn của chính nó (stats["exhausted"])
+# nên không kết luận được bài toán vô nghiệm.
+# "error": bộ giải gặp lỗi khi chạy (RuntimeError, OSError: bộ giải SAT ngoài
+# bị lỗi hoặc không có, worker song song chết...), thông báo nằm trong error
+statuses = ("solved", "unsolved", "incomplete", "timeout", "cancelled", "error")
+
+
+# Cờ dừng hợp tác: bật khi gọi cancel(), khi quá timeout giây kể từ lúc tạo,
+# hoặc khi cờ parent (một Event/CancelToken bên ngoài) bật
+class CancelToken:
+    def __init__(self, timeout=None, parent=None):
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.parent = parent
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def is_set(self):
+        if self.cancelled or self.expired():
+            return True
+        return self.parent is not None and self.parent.is_set()
+
+
+# Kết quả chung của mọi bộ giải. peak_memory: số byte cấp phát lớn nhất đo
+# bằng tracemalloc (chỉ trong tiến trình chính), None nếu không đo.
+# stats: các bộ đếm riêng của bộ giải (dict stats mà nó điền vào), None nếu
+# bộ giải không nhận stats. error: thông báo lỗi khi status là "error"
+@dataclass
+class Result:
+    moves: Optional[list]
+    elapsed: float
+    nodes_generated: Optional[int] = None
+    nodes_expanded: Optional[int] = None
+    max_depth: Optional[int] = None
+    peak_memory: Optional[int] = None
+    status: str = "unsolved"
+    stats: Optional[dict] = None
+    error: Optional[str] = None
+
+    @property
+    def solved(self):
+        return self.status == "solved"
+
+
+# Lấy hàm giải theo tên thuật toán (import module khi cần)
+def get_solver(name):
+    if name not in registry:
+        raise ValueError(f"Unknown algorithm: {name!r}")
+    module, function = registry[name]
+    return getattr(importlib.import_module(module), function)
+
+
+# Chạy thuật toán name với thời hạn timeout giây (None = không giới hạn) và cờ
+# dừng cancel; options được chuyển nguyên cho hàm giải. measure_memory=True đo
+# bộ nhớ đỉnh bằng tracemalloc (làm bộ giải chạy chậm hơn đáng kể).
+# Lỗi khi chạy bộ giải (RuntimeError, OSError) được trả về với status "error";
+# lỗi do tham số sai (ValueError, TypeError) vẫn được ném ra cho nơi gọi.
+def run_solver(
+    name,
+    start_goals,
+    ROWS,
+    COLS,
+    timeout=None,
+    cancel=None,
+    measure_memory=False,
+    **options,
+):
+    solve = get_solver(name)
+    # Bộ giải nhận stats: luôn truyền một dict để đọc được cờ exhausted
+    if "stats" in inspect.signature(solve).parameters:
+        options.setdefault("stats", {})
+    stats = options.get("stats")
+    token = CancelToken(timeout, cancel)
+    tracing = tracemalloc.is_tracing()
+    if measure_memory:
+        if not tracing:
+            tracemalloc.start()
+        elif hasattr(tracemalloc, "reset_peak"):  # Python 3.9+; trước đó đỉnh
+            tracemalloc.reset_peak()  # tính cả phần đã cấp phát trước khi chạy
+
+    error = None
+    start_time = time.time()
+    try:
+        path, _, generated, expanded, depth = solve(
+            start_goals, ROWS, COLS, cancel=token, **options
+        )
+    except (RuntimeError, OSError) as e:
+        path = generated = expanded = depth = None
+        error = str(e) or type(e).__name__
+    finally:
+        peak = tracemalloc.get_traced_memory()[1] if measure_memory else None
+        if measure_memory and not tracing:
+            tracemalloc.stop()
+    elapsed = time.time() - start_time
+
+    if error is not None:
+        status = "error"
+    elif path:
+        status = "solved"
+    elif token.cancelled or (cancel is not None and cancel.is_set()):
+        status = "cancelled"
+    elif token.expired():
+        status = "timeout"
+    elif stats is not None and stats.get("exhausted"):
+        status = "incomplete"
+    else:
+        status = "unsolved"
+    return Result(
+        path, elapsed, generated, expanded, depth, peak, status, stats, error
+    )
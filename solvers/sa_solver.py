@@ -1,7 +1,7 @@
-import copy
 import random
 import math
 import time
+import heapq
 from collections import deque
 
 directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
@@ -20,64 +20,324 @@ def get_neighbors(pos, ROWS, COLS):
     ]
 
 
-def random_path(start, goal, ROWS, COLS):
+def random_path(start, goal, ROWS, COLS, rng=random):
     """Sinh path ngẫu nhiên từ start đến goal"""
     queue = deque([(start, [start])])
     visited = set()
+    order = list(directions)  # Bản sao riêng, không xáo trộn directions dùng chung
     while queue:
         curr, path = queue.popleft()
         if curr == goal:
             return path
         visited.add(curr)
-        random.shuffle(directions)
-        for dr, dc in directions:
+        rng.shuffle(order)
+        for dr, dc in order:
             nr, nc = curr[0] + dr, curr[1] + dc
             next_pos = (nr, nc)
-            if (
-                is_inside(nr, nc, ROWS, COLS)
-                and next_pos not in visited
-                and next_pos not in path
-            ):
+            # Mọi ô trên path đều đã được lấy ra khỏi hàng đợi (nằm trong visited)
+            if is_inside(nr, nc, ROWS, COLS) and next_pos not in visited:
                 queue.append((next_pos, path + [next_pos]))
     return None
 
 
-def random_assignment(start_goals, ROWS, COLS):
+def random_assignment(start_goals, ROWS, COLS, rng=random):
     assignment = {}
     for color, (start, goal) in start_goals.items():
-        path = random_path(start, goal, ROWS, COLS)
+        path = random_path(start, goal, ROWS, COLS, rng)
         if path:
             assignment[color] = path
     return assignment
 
 
-def conflicts(assignment):
+def shortest_route(start, goal, taken, ROWS, COLS):
+    """BFS đường ngắn nhất từ start tới goal không đi qua các ô trong taken
+    (trừ goal). Trả về danh sách ô (gồm start, goal) hoặc None"""
+    parent = {start: None}
+    queue = deque([start])
+    while queue:
+        curr = queue.popleft()
+        if curr == goal:
+            path = []
+            while curr is not None:
+                path.append(curr)
+                curr = parent[curr]
+            return path[::-1]
+        for next_pos in get_neighbors(curr, ROWS, COLS):
+            if next_pos not in parent and (next_pos == goal or next_pos not in taken):
+                parent[next_pos] = curr
+                queue.append(next_pos)
+    return None
+
+
+def greedy_assignment(start_goals, ROWS, COLS, rng=random, partial=None):
+    """Khởi tạo tham lam: nối lần lượt từng màu (khoảng cách Manhattan ngắn
+    trước) bằng đường ngắn nhất tránh các ô đã bị chiếm. partial: {màu: đoạn
+    path bắt đầu từ start} được giữ nguyên và nối tiếp tới goal. Màu không còn
+    đường thì nối tiếp bằng random_path từ cuối đoạn đó (chấp nhận đi trùng, SA
+    sẽ sửa sau)"""
+    partial = partial or {}
+    assignment = {}
+    taken = {cell for pair in start_goals.values() for cell in pair}
+    for color, path in partial.items():
+        taken.update(path)
+
+    def distance(color):
+        (sr, sc), (gr, gc) = start_goals[color]
+        return abs(sr - gr) + abs(sc - gc)
+
+    colors = list(start_goals)
+    rng.shuffle(colors)  # Xáo trộn để các màu cùng khoảng cách đổi thứ tự
+    colors.sort(key=lambda color: (color not in partial, distance(color)))
+    for color in colors:
+        start, goal = start_goals[color]
+        prefix = partial.get(color) or [start]
+        if prefix[-1] == goal:
+            assignment[color] = list(prefix)
+            continue
+        rest = shortest_route(prefix[-1], goal, taken, ROWS, COLS)
+        if rest:
+            assignment[color] = list(prefix) + rest[1:]
+            taken.update(rest)
+        else:
+            rest = random_path(prefix[-1], goal, ROWS, COLS, rng)
+            if rest:
+                assignment[color] = list(prefix) + rest[1:]
+    return assignment
+
+
+def astar_partial(start_goals, ROWS, COLS, fill=0.5, budget=300):
+    """Tìm kiếm best-first như solve_astar(mode="greedy") nhưng chỉ đi tới khi
+    đã đặt fill phần số nước đi của một lời giải, tức fill phần các ô trống
+    của lưới ban đầu (hoặc hết budget lần mở rộng); trả về {màu: đoạn path}
+    của node đi được xa nhất, cắt bớt còn đúng số nước đó để phần còn lại dành
+    cho SA. Các nước bắt buộc ở gốc cũng được tính vào số nước đi như cost của
+    node. Node con đã được loại các trạng thái bế tắc nên đoạn path luôn nhất
+    quán"""
+    from solvers.astar_solver import MatrixBoard, directions as deltas
+    from solvers.astar_solver import reconstruct_path
+
+    board = MatrixBoard(start_goals, ROWS, COLS)
+    best = board.initial_node()
+    # Số nước đi tối đa được đặt; một lời giải có đúng ROWS * COLS - số màu nước
+    # đi, cùng gốc với cost (tính cả các nước bắt buộc ở gốc)
+    limit = int(fill * (ROWS * COLS - len(start_goals)))
+    open_list = [(0, best)]
     seen = set()
-    conflict = 0
-    for path in assignment.values():
-        for cell in path:
-            if cell in seen:
-                conflict += 1
-            seen.add(cell)
-    return conflict
+    while open_list and budget > 0 and best.cost < limit:
+        current = heapq.heappop(open_list)[-1]
+        budget -= 1
+        if current.cost > best.cost:
+            best = current
+        key = board.encode_state(current)
+        if key in seen:
+            continue
+        seen.add(key)
+        for child in board.generate_successors(current):
+            child.f = board.heuristic(child)
+            heapq.heappush(open_list, (child.f, child))
+
+    partial = {color: [start] for color, (start, _) in start_goals.items()}
+    for color, move in reconstruct_path(best)[:limit]:
+        (r, c), (dr, dc) = partial[color][-1], deltas[move]
+        partial[color].append((r + dr, c + dc))
+    return partial
+
+
+partial_cache = {}  # Khóa bài toán -> trạng thái tốt nhất của lần chạy SA trước
+partial_cache_size = 64  # Số bài toán được giữ, bỏ mục cũ nhất khi đầy
+
+
+def puzzle_key(start_goals, ROWS, COLS):
+    return ROWS, COLS, tuple(sorted(start_goals.items()))
+
+
+def remember_partial(start_goals, ROWS, COLS, paths):
+    key = puzzle_key(start_goals, ROWS, COLS)
+    partial_cache.pop(key, None)
+    partial_cache[key] = paths
+    while len(partial_cache) > partial_cache_size:
+        del partial_cache[next(iter(partial_cache))]
+
+
+def initial_assignment(start_goals, ROWS, COLS, warm_start, rng=random):
+    """Trạng thái xuất phát của SA theo warm_start (xem warm_starts); một dict
+    {màu: đoạn path} được dùng làm lời giải dở dang và nối tiếp tham lam"""
+    if isinstance(warm_start, dict):
+        return greedy_assignment(start_goals, ROWS, COLS, rng, warm_start)
+    if warm_start not in warm_starts:
+        raise ValueError(f"Unknown SA warm start: {warm_start!r}")
+    if warm_start == "random":
+        return random_assignment(start_goals, ROWS, COLS, rng)
+    if warm_start == "astar":
+        partial = astar_partial(start_goals, ROWS, COLS)
+    else:
+        partial = partial_cache.get(puzzle_key(start_goals, ROWS, COLS))
+    return greedy_assignment(start_goals, ROWS, COLS, rng, partial)
+
+
+warm_starts = ("random", "greedy", "astar", "cached")
+
+
+class PathState:
+    """Trạng thái SA: path của từng màu và số lần mỗi ô bị các path đi qua.
+    cost = số lần đi trùng + số ô trống, được cập nhật theo từng thay đổi"""
+
+    def __init__(self, assignment, ROWS, COLS):
+        self.paths = dict(assignment)
+        self.counts = [[0] * COLS for _ in range(ROWS)]
+        self.cost = ROWS * COLS  # Ban đầu mọi ô đều trống
+        for path in self.paths.values():
+            self.cost += self.add(path)
+
+    def add(self, path):
+        """Tăng số đếm các ô của path, trả về độ thay đổi cost"""
+        delta = 0
+        for r, c in path:
+            delta += 1 if self.counts[r][c] else -1
+            self.counts[r][c] += 1
+        return delta
+
+    def remove(self, path):
+        """Giảm số đếm các ô của path, trả về độ thay đổi cost"""
+        delta = 0
+        for r, c in path:
+            self.counts[r][c] -= 1
+            delta += -1 if self.counts[r][c] else 1
+        return delta
+
+    def replace(self, color, new_path):
+        """Thay path của color tại chỗ; trả về (path cũ, độ thay đổi cost).
+        Gọi lại replace với path cũ để hoàn tác"""
+        old_path = self.paths[color]
+        delta = self.remove(old_path) + self.add(new_path)
+        self.paths[color] = new_path
+        self.cost += delta
+        return old_path, delta
 
 
-def cost(assignment, ROWS, COLS):
-    total = conflicts(assignment)
-    # penalty cho ô chưa đi qua
-    covered = set(cell for path in assignment.values() for cell in path)
-    empty_cells = ROWS * COLS - len(covered)
-    return total + empty_cells
+def neighbor(state, start_goals, ROWS, COLS, rng=random):
+    """Đề xuất lân cận: chọn 1 màu và một path mới cho nó (chưa áp dụng)"""
+    color = rng.choice(list(state.paths))
+    start, goal = start_goals[color]
+    return color, random_path(start, goal, ROWS, COLS, rng)
 
 
-def neighbor(assignment, start_goals, ROWS, COLS):
-    """Tạo lân cận bằng cách đổi lại 1 path"""
-    new_assignment = copy.deepcopy(assignment)
-    color = random.choice(list(assignment.keys()))
-    new_path = random_path(start_goals[color][0], start_goals[color][1], ROWS, COLS)
-    if new_path:
-        new_assignment[color] = new_path
-    return new_assignment
+def route(start, goal, blocked, counts, ROWS, COLS, rng=random, budget=200):
+    """DFS ngẫu nhiên từ start tới goal không đi qua blocked, ưu tiên ô trống
+    để path mới lấp thêm ô. Trả về danh sách ô (gồm start, goal) hoặc None"""
+
+    def options(cell):
+        cells = get_neighbors(cell, ROWS, COLS)
+        rng.shuffle(cells)
+        cells.sort(key=lambda p: counts[p[0]][p[1]] == 0)  # Ô trống được lấy trước
+        return cells
+
+    path = [start]
+    on_path = {start}
+    stack = [options(start)]
+    while stack and budget > 0:
+        budget -= 1
+        if not stack[-1]:
+            on_path.discard(path.pop())
+            stack.pop()
+            continue
+        nxt = stack[-1].pop()
+        if nxt == goal:
+            return path + [goal]
+        if nxt in blocked or nxt in on_path:
+            continue
+        path.append(nxt)
+        on_path.add(nxt)
+        stack.append(options(nxt))
+    return None
+
+
+def reroute_segment(state, start_goals, ROWS, COLS, rng=random):
+    """Đi lại một đoạn con ngẫu nhiên của một path, tránh phần còn lại của nó"""
+    color = rng.choice(list(state.paths))
+    path = state.paths[color]
+    i = rng.randrange(len(path) - 1)
+    j = rng.randrange(i + 1, len(path))
+    blocked = set(path[:i]) | set(path[j + 1 :])
+    segment = route(path[i], path[j], blocked, state.counts, ROWS, COLS, rng)
+    if segment is None:
+        return color, None
+    return color, path[:i] + segment + path[j + 1 :]
+
+
+def push_around(state, start_goals, ROWS, COLS, rng=random, attempts=8):
+    """Đẩy một cạnh a-b của path sang hai ô kề song song a'-b' (a, a', b', b),
+    ưu tiên khi a', b' đang trống"""
+    color = rng.choice(list(state.paths))
+    path = state.paths[color]
+    on_path = set(path)
+    fallback = None
+    for _ in range(attempts):
+        k = rng.randrange(len(path) - 1)
+        (ar, ac), (br, bc) = path[k], path[k + 1]
+        pr, pc = rng.choice([(bc - ac, br - ar), (ac - bc, ar - br)])  # Vuông góc
+        a2, b2 = (ar + pr, ac + pc), (br + pr, bc + pc)
+        if not (is_inside(*a2, ROWS, COLS) and is_inside(*b2, ROWS, COLS)):
+            continue
+        if a2 in on_path or b2 in on_path:
+            continue
+        new_path = path[: k + 1] + [a2, b2] + path[k + 1 :]
+        if state.counts[a2[0]][a2[1]] == 0 or state.counts[b2[0]][b2[1]] == 0:
+            return color, new_path
+        fallback = fallback or new_path
+    return color, fallback
+
+
+def swap_contested(state, start_goals, ROWS, COLS, rng=random):
+    """Trả một ô đang bị nhiều luồng đi qua cho một luồng: luồng còn lại đi
+    vòng quanh ô đó (không áp dụng cho ô đầu/đích của chính luồng)"""
+    contested = [
+        (r, c) for r in range(ROWS) for c in range(COLS) if state.counts[r][c] > 1
+    ]
+    if not contested:
+        return None, None
+    cell = rng.choice(contested)
+    owners = [
+        color for color, path in state.paths.items() if cell in path[1:-1]
+    ]
+    if not owners:
+        return None, None
+    color = rng.choice(owners)
+    path = state.paths[color]
+    k = path.index(cell)
+    blocked = set(path[: k - 1]) | set(path[k + 2 :]) | {cell}
+    segment = route(path[k - 1], path[k + 1], blocked, state.counts, ROWS, COLS, rng)
+    if segment is None:
+        return color, None
+    return color, path[: k - 1] + segment + path[k + 2 :]
+
+
+operators = {
+    "regenerate": neighbor,
+    "reroute": reroute_segment,
+    "push": push_around,
+    "swap": swap_contested,
+}  # Các toán tử lân cận
+
+
+class OperatorSelector:
+    """Chọn toán tử theo tỉ lệ chấp nhận gần đây (trung bình trượt mũ),
+    mỗi toán tử luôn giữ xác suất tối thiểu floor để không bị bỏ hẳn"""
+
+    def __init__(self, names, rng=random, rate=0.05, floor=0.05):
+        self.names = list(names)
+        self.rng = rng
+        self.rate = rate
+        self.floor = floor
+        self.scores = {name: 0.5 for name in self.names}
+
+    def choose(self):
+        weights = [max(self.scores[name], self.floor) for name in self.names]
+        return self.rng.choices(self.names, weights)[0]
+
+    def update(self, name, accepted):
+        score = self.scores[name]
+        self.scores[name] = score + self.rate * (accepted - score)
 
 
 def convert_to_moves(assignment):
@@ -99,37 +359,223 @@ def convert_to_moves(assignment):
     return result
 
 
+def anneal_step(state, selector, T, start_goals, ROWS, COLS, rng=random):
+    """Một bước SA: đề xuất lân cận, chấp nhận theo Metropolis ở nhiệt độ T,
+    hoàn tác nếu bị từ chối. Trả về True nếu nước đi được chấp nhận"""
+    name = selector.choose()
+    color, new_path = operators[name](state, start_goals, ROWS, COLS, rng)
+    if not new_path:
+        selector.update(name, False)
+        return False
+    old_path, delta = state.replace(color, new_path)
+    accepted = delta < 0 or rng.random() < math.exp(-delta / T)
+    selector.update(name, accepted)
+    if not accepted:
+        state.replace(color, old_path)  # Hoàn tác nước đi bị từ chối
+    return accepted
+
+
+def calibrate_temperature(
+    state,
+    selector,
+    start_goals,
+    ROWS,
+    COLS,
+    rng=random,
+    samples=200,
+    acceptance=0.5,
+    cancel=None,
+):
+    """Ước lượng nhiệt độ ban đầu từ các nước đi thử (hoàn tác ngay): lấy trung
+    bình d của các delta dương rồi chọn T sao cho exp(-d / T) = acceptance.
+    Dừng sớm (với các mẫu đã có) khi cờ cancel bật"""
+    deltas = []
+    for _ in range(samples):
+        if cancel is not None and cancel.is_set():
+            break
+        color, new_path = operators[selector.choose()](
+            state, start_goals, ROWS, COLS, rng
+        )
+        if not new_path:
+            continue
+        old_path, delta = state.replace(color, new_path)
+        state.replace(color, old_path)
+        if delta > 0:
+            deltas.append(delta)
+    if not deltas:
+        return 1.0
+    return -sum(deltas) / len(deltas) / math.log(acceptance)
+
+
+schedules = ("adaptive", "geometric")
+
+
 def solve_sa(
-    start_goals, ROWS=5, COLS=5, Tmax=700.0, Tmin=0.005, alpha=0.95, iter_per_temp=1500
+    start_goals,
+    ROWS=5,
+    COLS=5,
+    Tmax=None,
+    Tmin=0.005,
+    alpha=None,
+    iter_per_temp=1500,
+    moves=None,
+    seed=None,
+    workers=1,
+    schedule=None,
+    patience=None,
+    max_reheats=None,
+    max_steps=None,
+    rounds=None,
+    chains=None,
+    warm_start="random",
+    stats=None,
+    cancel=None,
+    check_every=64,
 ):
+    """moves: danh sách tên toán tử trong operators (mặc định dùng tất cả);
+    toán tử được chọn thích nghi theo tỉ lệ chấp nhận gần đây.
+    seed: hạt giống cho bộ sinh số ngẫu nhiên riêng của lần chạy.
+    workers khác 1 (None = số CPU): parallel tempering nhiều chuỗi trên nhiều
+    tiến trình (xem parallel_sa.solve_parallel_sa) với rounds vòng và chains
+    chuỗi (None = mặc định của solve_parallel_sa). Các chuỗi chạy ở nhiệt độ
+    cố định nên alpha, schedule, patience, max_reheats và max_steps chỉ dùng
+    khi chạy tuần tự (mặc định 0.95, "adaptive", 20, 5, không giới hạn);
+    truyền chúng cùng workers, hoặc rounds/chains khi chạy tuần tự, gây ra
+    ValueError.
+    Tmax = None: nhiệt độ ban đầu được ước lượng bằng calibrate_temperature.
+    schedule "geometric": T giảm theo alpha sau đúng iter_per_temp bước cho tới
+    Tmin. schedule "adaptive": mỗi mức nhiệt dừng sớm khi đã chấp nhận
+    iter_per_temp // 10 nước đi (nên qua nhanh các mức nóng); khi best không
+    giảm sau patience mức liên tiếp hoặc T < Tmin thì hâm nóng lại từ best,
+    tối đa max_reheats lần. Mỗi chu kỳ nhiều nhất khoảng
+    log(Tmin / Tmax) / log(alpha) mức nhiệt, mỗi mức iter_per_temp bước, nên
+    trường hợp xấu nhất (bài toán vô nghiệm hoặc quá khó) tốn gấp
+    max_reheats + 1 lần schedule "geometric" (với mặc định khoảng 6 x 120 x 1500
+    bước). max_steps: giới hạn tổng số bước của mọi chu kỳ (None = không giới
+    hạn); hết giới hạn thì dừng như khi hết lượt hâm nóng.
+    warm_start: trạng thái xuất phát, "random" (random_path độc lập cho từng
+    màu), "greedy" (greedy_assignment), "astar" (astar_partial rồi nối tham
+    lam), "cached" (trạng thái tốt nhất của lần chạy trước trên cùng bài toán)
+    hoặc một dict {màu: đoạn path}.
+    stats (nếu truyền vào một dict) nhận nhiệt độ ban đầu, số lần hâm nóng, cost
+    tốt nhất và exhausted = True khi dừng mà chưa có lời giải (SA không chứng
+    minh được bài toán vô nghiệm); được điền đầy đủ trước mọi lần trả về.
+    cancel: cờ dừng hợp tác (xem registry.CancelToken), kiểm tra sau mỗi
+    check_every bước"""
+    serial_options = {
+        "alpha": alpha,
+        "schedule": schedule,
+        "patience": patience,
+        "max_reheats": max_reheats,
+        "max_steps": max_steps,
+    }
+    parallel_options = {"rounds": rounds, "chains": chains}
+    if workers != 1:
+        from solvers.parallel_sa import solve_parallel_sa
+
+        for name, value in serial_options.items():
+            if value is not None:
+                raise ValueError(f"Parallel SA does not support {name}")
+        options = {k: v for k, v in parallel_options.items() if v is not None}
+        return solve_parallel_sa(
+            start_goals,
+            ROWS,
+            COLS,
+            Tmax=Tmax,
+            Tmin=Tmin,
+            sweep=iter_per_temp,
+            moves=moves,
+            seed=seed,
+            workers=workers,
+            warm_start=warm_start,
+            stats=stats,
+            cancel=cancel,
+            check_every=check_every,
+            **options,
+        )
+
+    for name, value in parallel_options.items():
+        if value is not None:
+            raise ValueError(f"Serial SA does not support {name}")
+    alpha = 0.95 if alpha is None else alpha
+    schedule = "adaptive" if schedule is None else schedule
+    patience = 20 if patience is None else patience
+    max_reheats = 5 if max_reheats is None else max_reheats
+    if schedule not in schedules:
+        raise ValueError(f"Unknown SA schedule: {schedule!r}")
 
     start_time = time.time()
-    current = random_assignment(start_goals, ROWS, COLS)
-    if not current:
+    if stats is None:
+        stats = {}
+    stats.update(Tmax=Tmax, reheats=0, cost=None, exhausted=False)
+    rng = random.Random(seed)
+    current = initial_assignment(start_goals, ROWS, COLS, warm_start, rng)
+    if len(current) < len(start_goals):
         return None, None, None, None, None
 
-    current_cost = cost(current, ROWS, COLS)
-    best = current
-    best_cost = current_cost
+    state = PathState(current, ROWS, COLS)
+    best = dict(state.paths)
+    best_cost = state.cost
+    stats["cost"] = best_cost
+    selector = OperatorSelector(moves or operators, rng)
+    if best_cost == 0:  # Trạng thái xuất phát đã là lời giải
+        remember_partial(start_goals, ROWS, COLS, best)
+        return convert_to_moves(best), time.time() - start_time, None, None, None
+    if Tmax is None:
+        Tmax = calibrate_temperature(
+            state, selector, start_goals, ROWS, COLS, rng, cancel=cancel
+        )
+        stats["Tmax"] = Tmax
+
+    adaptive = schedule == "adaptive"
+    quota = max(iter_per_temp // 10, 1) if adaptive else iter_per_temp + 1
     T = Tmax
+    stale = 0  # Số mức nhiệt liên tiếp best không giảm
+    steps_left = max_steps
 
-    while T > Tmin:
-        for _ in range(iter_per_temp):
-            next_state = neighbor(current, start_goals, ROWS, COLS)
-            next_cost = cost(next_state, ROWS, COLS)
-            delta = next_cost - current_cost
-            if delta < 0 or random.random() < math.exp(-delta / T):
-                current = next_state
-                current_cost = next_cost
-                if current_cost < best_cost:
-                    best = current
-                    best_cost = current_cost
-                    if best_cost == 0:
-                        steps = convert_to_moves(best)
-                        return steps, time.time() - start_time, None, None, None
+    while cancel is None or not cancel.is_set():
+        if steps_left is not None and steps_left <= 0:
+            break
+        accepted = 0
+        improved = False
+        level_steps = iter_per_temp
+        if steps_left is not None:
+            level_steps = min(level_steps, steps_left)
+        step = 0
+        for step in range(level_steps):
+            if step % check_every == 0 and cancel is not None and cancel.is_set():
+                break
+            if not anneal_step(state, selector, T, start_goals, ROWS, COLS, rng):
+                continue
+            accepted += 1
+            if state.cost < best_cost:
+                best = dict(state.paths)
+                best_cost = state.cost
+                stats["cost"] = best_cost
+                improved = True
+                if best_cost == 0:
+                    remember_partial(start_goals, ROWS, COLS, best)
+                    steps = convert_to_moves(best)
+                    return steps, time.time() - start_time, None, None, None
+            if accepted >= quota:
+                break
+        if steps_left is not None:
+            steps_left -= step + 1
         T *= alpha
+        stale = 0 if improved else stale + 1
+
+        if not adaptive:
+            if T <= Tmin:
+                break
+        elif stale >= patience or T < Tmin:
+            if stats["reheats"] == max_reheats:
+                break
+            # Hâm nóng lại: quay về best và tiếp tục từ nhiệt độ ban đầu
+            stats["reheats"] += 1
+            state = PathState(best, ROWS, COLS)
+            T = Tmax
+            stale = 0
 
-    if best_cost == 0:
-        steps = convert_to_moves(best)
-        return steps, time.time() - start_time, None, None, None
+    remember_partial(start_goals, ROWS, COLS, best)
+    stats["exhausted"] = cancel is None or not cancel.is_set()
     return None, None, None, None, None
@@ -0,0 +1,380 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+from solvers.cdcl import CDCLSolver
+from solvers.csp_solver import convert_paths_to_moves, directions
+
+# Các bộ giải SAT ngoài được thử theo thứ tự nếu có trên PATH
+external_solvers = ("kissat", "cadical", "glucose", "minisat", "picosat")
+output_file_solvers = ("glucose", "minisat")  # Ghi kết quả ra tệp thay vì stdout
+backends = ("auto", "builtin", "external")
+
+
+# Mã hóa bài toán thành CNF:
+#   color(ô, k): ô mang màu k, mỗi ô đúng một màu
+#   link(i, j): hai ô kề i, j nằm liền nhau trên cùng một đường đi
+#   shape(ô, t): tập hướng t mà ô nối sang ô kề, mỗi ô đúng một shape; đầu/đích
+#                nối theo đúng một hướng, các ô khác theo đúng hai hướng
+#   arc(i, j): đường đi đi từ i sang j, tức j là ô kế tiếp (successor) của i và
+#              i là ô liền trước (predecessor) của j; link(i, j) đúng khi và chỉ
+#              khi có đúng một trong arc(i, j), arc(j, i). Ô đầu có đúng một cạnh
+#              ra và không có cạnh vào, ô đích ngược lại, các ô khác có đúng một
+#              cạnh vào và một cạnh ra
+#   rank(ô, v): khoảng cách từ ô đầu tới ô theo đường đi ít nhất là v (mã hóa
+#               thứ tự, v = 1..max_rank); ô đầu có khoảng cách 0 và arc(i, j)
+#               buộc rank(j) >= rank(i) + 1, nên không thể có chu trình
+# shape quyết định link của cả bốn cạnh quanh ô, còn link buộc hai ô cùng màu.
+# acyclic=False bỏ arc/rank; khi đó các chu trình tách rời được cấm dần bằng
+# các biến shape (xem cycle_clauses).
+class FlowEncoding:
+    def __init__(self, start_goals, ROWS, COLS, acyclic=True):
+        self.ROWS = ROWS
+        self.COLS = COLS
+        self.size = ROWS * COLS
+        self.colors = list(start_goals)
+        self.starts = []
+        self.endpoints = {}  # Ô đầu/đích -> chỉ số màu
+        for k, (start, goal) in enumerate(start_goals.values()):
+            self.starts.append(start[0] * COLS + start[1])
+            self.endpoints[start[0] * COLS + start[1]] = k
+            self.endpoints[goal[0] * COLS + goal[1]] = k
+
+        # Ô kề theo từng hướng (-1 nếu ra ngoài lưới)
+        self.neighbor = []
+        for i in range(self.size):
+            r, c = divmod(i, COLS)
+            cell = []
+            for dr, dc in directions:
+                nr, nc = r + dr, c + dc
+                inside = 0 <= nr < ROWS and 0 <= nc < COLS
+                cell.append(nr * COLS + nc if inside else -1)
+            self.neighbor.append(cell)
+
+        self.num_vars = self.size * len(self.colors)
+        self.link_vars = {}  # (ô nhỏ hơn, ô lớn hơn) -> biến
+        for i in range(self.size):
+            for j in self.neighbor[i]:
+                if j > i:
+                    self.num_vars += 1
+                    self.link_vars[i, j] = self.num_vars
+        self.shape_vars = [{} for _ in range(self.size)]  # [ô] {hướng: biến}
+        for i in range(self.size):
+            valid = [d for d in range(4) if self.neighbor[i][d] != -1]
+            if i in self.endpoints:
+                shapes = [(d,) for d in valid]
+            else:
+                shapes = [(a, b) for a in valid for b in valid if a < b]
+            for t in shapes:
+                self.num_vars += 1
+                self.shape_vars[i][t] = self.num_vars
+
+        self.arc_vars = {}  # (ô đi, ô đến) -> biến
+        # Một đường đi có nhiều nhất size - 2 * (số màu - 1) ô
+        self.max_rank = max(1, self.size - 2 * len(self.colors) + 1)
+        self.rank_vars = []  # [ô][v], v = 1..max_rank (phần tử 0 không dùng)
+        if acyclic:
+            for i, j in self.link_vars:
+                for a, b in ((i, j), (j, i)):
+                    self.num_vars += 1
+                    self.arc_vars[a, b] = self.num_vars
+            for i in range(self.size):
+                first = self.num_vars + 1
+                self.rank_vars.append([0] + list(range(first, first + self.max_rank)))
+                self.num_vars += self.max_rank
+        self.clauses = self.build_clauses()
+
+    def color_var(self, i, k):
+        return 1 + i * len(self.colors) + k
+
+    def link_var(self, i, j):
+        return self.link_vars[min(i, j), max(i, j)]
+
+    def neighbors(self, i):
+        return [j for j in self.neighbor[i] if j != -1]
+
+    # Ràng buộc "đúng một" trong các literal: một mệnh đề ít nhất một cộng các
+    # cặp không đồng thời
+    def exactly_one(self, lits, clauses):
+        clauses.append(list(lits))
+        for a in range(len(lits)):
+            for b in range(a + 1, len(lits)):
+                clauses.append([-lits[a], -lits[b]])
+
+    def build_clauses(self):
+        clauses = []
+        K = len(self.colors)
+        for i in range(self.size):
+            self.exactly_one([self.color_var(i, k) for k in range(K)], clauses)
+            if i in self.endpoints:
+                clauses.append([self.color_var(i, self.endpoints[i])])
+
+            shapes = self.shape_vars[i]
+            self.exactly_one(list(shapes.values()), clauses)
+            for t, v in shapes.items():
+                for d in range(4):
+                    j = self.neighbor[i][d]
+                    if j != -1:
+                        link = self.link_var(i, j)
+                        clauses.append([-v, link] if d in t else [-v, -link])
+
+        # Hai ô liền nhau trên đường đi thì cùng màu
+        for (i, j), link in self.link_vars.items():
+            for k in range(K):
+                clauses.append([-link, -self.color_var(i, k), self.color_var(j, k)])
+                clauses.append([-link, self.color_var(i, k), -self.color_var(j, k)])
+        if self.arc_vars:
+            self.acyclic_clauses(clauses)
+        return clauses
+
+    # Định hướng mỗi link thành một arc và đánh số khoảng cách từ ô đầu dọc
+    # theo arc; một chu trình sẽ cần rank tăng mãi nên bị loại ngay trong CNF
+    def acyclic_clauses(self, clauses):
+        for (i, j), link in self.link_vars.items():
+            forward, backward = self.arc_vars[i, j], self.arc_vars[j, i]
+            clauses.append([-link, forward, backward])
+            clauses.append([-forward, link])
+            clauses.append([-backward, link])
+            clauses.append([-forward, -backward])
+
+        goals = set(self.endpoints) - set(self.starts)
+        for i in range(self.size):
+            out = [self.arc_vars[i, j] for j in self.neighbors(i)]
+            into = [self.arc_vars[j, i] for j in self.neighbors(i)]
+            if i not in goals:
+                self.exactly_one(out, clauses)
+            else:
+                clauses.extend([-v] for v in out)
+            if i not in self.starts:
+                self.exactly_one(into, clauses)
+            else:
+                clauses.extend([-v] for v in into)
+
+            rank = self.rank_vars[i]
+            for v in range(1, self.max_rank):
+                clauses.append([-rank[v + 1], rank[v]])
+
+        for start in self.starts:
+            clauses.append([-self.rank_vars[start][1]])
+
+        # arc(i, j) -> rank(j) >= rank(i) + 1, và rank(i) < max_rank
+        L = self.max_rank
+        for (i, j), arc in self.arc_vars.items():
+            src, dst = self.rank_vars[i], self.rank_vars[j]
+            clauses.append([-arc, dst[1]])
+            for v in range(1, L):
+                clauses.append([-arc, -src[v], dst[v + 1]])
+            clauses.append([-arc, -src[L]])
+
+    # Các ô kề được nối với ô i theo model
+    def linked(self, model, i):
+        return [j for j in self.neighbors(i) if model[self.link_var(i, j)]]
+
+    # Lần theo các link từ ô đầu của mỗi màu; trả về ({màu: ô}, tập ô đã thăm)
+    def extract_paths(self, model):
+        paths = {}
+        visited = set()
+        for k, start in enumerate(self.starts):
+            prev, cell = -1, start
+            path = [divmod(start, self.COLS)]
+            visited.add(start)
+            while True:
+                nxt = next(j for j in self.linked(model, cell) if j != prev)
+                prev, cell = cell, nxt
+                visited.add(cell)
+                path.append(divmod(cell, self.COLS))
+                if cell in self.endpoints:
+                    break
+            paths[self.colors[k]] = path
+        return paths, visited
+
+    # Mỗi chu trình (các ô nối với nhau nhưng không thuộc đường đi nào) sinh một
+    # mệnh đề cấm đúng tổ hợp shape của các ô trong chu trình
+    def cycle_clauses(self, model, visited):
+        clauses = []
+        remaining = set(range(self.size)) - visited
+        while remaining:
+            stack = [remaining.pop()]
+            clause = []
+            while stack:
+                i = stack.pop()
+                clause.extend(-v for v in self.shape_vars[i].values() if model[v])
+                for j in self.linked(model, i):
+                    if j in remaining:
+                        remaining.discard(j)
+                        stack.append(j)
+            clauses.append(clause)
+        return clauses
+
+
+def write_dimacs(clauses, num_vars, path):
+    with open(path, "w") as f:
+        f.write(f"p cnf {num_vars} {len(clauses)}\n")
+        for clause in clauses:
+            f.write(" ".join(map(str, clause)) + " 0\n")
+
+
+def find_external_solver():
+    for name in external_solvers:
+        binary = shutil.which(name)
+        if binary:
+            return binary
+    return None
+
+
+# Chạy một lệnh, kiểm tra cancel mỗi poll giây và dừng hẳn tiến trình khi cờ
+# bật. stdout được ghi ra log_path (không dùng pipe nên không bị nghẽn khi bộ
+# giải in model lớn). Trả về mã thoát của tiến trình, None nếu đã bị dừng
+def run_process(command, log_path, cancel=None, poll=0.05):
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            command, stdout=log, stderr=subprocess.DEVNULL, text=True
+        )
+        try:
+            while True:
+                try:
+                    return process.wait(timeout=None if cancel is None else poll)
+                except subprocess.TimeoutExpired:
+                    if cancel.is_set():
+                        return None
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+
+def read_lines(path):
+    try:
+        with open(path) as f:
+            return f.read().split("\n")
+    except OSError:
+        return []
+
+
+# Chạy bộ giải ngoài trên một tệp DIMACS; trả về model, hoặc None nếu vô nghiệm
+# hoặc bị dừng bởi cancel. Bộ giải thoát với mã 10 khi có nghiệm, 20 khi vô
+# nghiệm; bộ giải bị lỗi, bị dừng từ bên ngoài hoặc in kết quả không đọc được
+# gây ra RuntimeError chứ không bị coi là vô nghiệm
+def run_external(binary, cnf_path, num_vars, cancel=None):
+    name = os.path.basename(binary)
+    log_path = cnf_path + ".log"
+    if name in output_file_solvers:
+        out_path = cnf_path + ".out"
+        if os.path.exists(out_path):
+            os.remove(out_path)  # Không đọc nhầm kết quả của vòng trước
+        code = run_process([binary, cnf_path, out_path], log_path, cancel)
+        lines = read_lines(out_path)
+        answer = lines[0].strip() if lines else ""
+        values = lines[1].split() if answer == "SAT" and len(lines) > 1 else []
+    else:
+        code = run_process([binary, cnf_path], log_path, cancel)
+        lines = read_lines(log_path)
+        status = [line.strip() for line in lines if line.startswith("s ")]
+        answer = {"s SATISFIABLE": "SAT", "s UNSATISFIABLE": "UNSAT"}.get(
+            status[0] if status else "", ""
+        )
+        values = [
+            x for line in lines if line.startswith("v ") for x in line[2:].split()
+        ]
+    if code is None:
+        return None
+    if (answer == "UNSAT" and code in (0, 20)) or (not answer and code == 20):
+        return None
+    if answer != "SAT" or code not in (0, 10):
+        raise RuntimeError(
+            f"SAT solver {name} failed (exit code {code}, answer {answer or 'none'})"
+        )
+
+    model = [False] * (num_vars + 1)
+    for value in map(int, values):
+        if value > 0:
+            model[value] = True
+    return model
+
+
+# Giải bằng SAT: mã hóa CNF, giải bằng bộ giải ngoài (nếu có trên PATH và
+# backend cho phép) hoặc bộ giải CDCL đi kèm. dimacs_path: nơi ghi CNF ban đầu.
+# acyclic=True (mặc định) đưa ràng buộc không chu trình vào CNF (biến arc và
+# rank của FlowEncoding) nên một lần giải là đủ để kết luận có hay không có lời
+# giải. acyclic=False dùng bảng mã nhỏ hơn không có arc/rank: lời giải có chu
+# trình tách rời thì thêm mệnh đề cấm chu trình đó rồi giải lại, tối đa
+# max_rounds vòng; hết vòng mà vẫn còn chu trình thì kết quả là "incomplete".
+# stats (nếu truyền vào một dict) nhận số biến, số mệnh đề, số vòng giải lại,
+# các bộ đếm của bộ giải CDCL và exhausted = True nếu đã hết max_rounds vòng
+# mà lời giải vẫn còn chu trình (khi đó không kết luận được là vô nghiệm).
+# cancel: cờ dừng hợp tác (xem registry.CancelToken), bộ giải đi kèm kiểm tra
+# ở mỗi xung đột, tiến trình bộ giải ngoài bị dừng hẳn khi cờ bật. Bộ giải
+# ngoài bị lỗi gây ra RuntimeError (xem run_external).
+def solve_sat(
+    start_goals,
+    ROWS,
+    COLS,
+    backend="auto",
+    dimacs_path=None,
+    max_rounds=100,
+    stats=None,
+    cancel=None,
+    acyclic=True,
+):
+    if backend not in backends:
+        raise ValueError(f"Unknown SAT backend: {backend!r}")
+    start_time = time.time()
+    encoding = FlowEncoding(start_goals, ROWS, COLS, acyclic)
+    clauses = list(encoding.clauses)
+    if dimacs_path is not None:
+        write_dimacs(clauses, encoding.num_vars, dimacs_path)
+
+    binary = find_external_solver() if backend != "builtin" else None
+    if backend == "external" and binary is None:
+        raise FileNotFoundError("No SAT solver found on PATH")
+    if stats is None:
+        stats = {}
+    stats.update(
+        variables=encoding.num_vars,
+        clauses=len(clauses),
+        rounds=0,
+        solver=binary or "builtin",
+        exhausted=False,
+    )
+
+    solver = None
+    if binary is None:
+        # Nạp từng mệnh đề để cancel dừng được cả khi bảng mã lớn
+        solver = CDCLSolver(encoding.num_vars)
+        for index, clause in enumerate(clauses):
+            if index % 10000 == 0 and cancel is not None and cancel.is_set():
+                return None, None, None, None, None
+            solver.add_clause(clause)
+    with tempfile.TemporaryDirectory() as tmp:
+        cnf_path = os.path.join(tmp, "flow.cnf")
+        for _ in range(max_rounds):
+            if cancel is not None and cancel.is_set():
+                break
+            stats["rounds"] += 1
+            if solver is not None:
+                model = solver.model if solver.solve(cancel=cancel) else None
+            else:
+                write_dimacs(clauses, encoding.num_vars, cnf_path)
+                model = run_external(binary, cnf_path, encoding.num_vars, cancel)
+            if model is None:
+                break
+
+            paths, visited = encoding.extract_paths(model)
+            if len(visited) == encoding.size:
+                if solver is not None:
+                    stats.update(decisions=solver.decisions, conflicts=solver.conflicts)
+                time_used = time.time() - start_time
+                return convert_paths_to_moves(paths), time_used, None, None, None
+
+            for clause in encoding.cycle_clauses(model, visited):
+                clauses.append(clause)
+                if solver is not None:
+                    solver.add_clause(clause)
+        else:
+            stats["exhausted"] = True  # Hết vòng giải lại, chưa rõ có lời giải
+
+    if solver is not None:
+        stats.update(decisions=solver.decisions, conflicts=solver.conflicts)
+    return None, None, None, None, None
@@ -0,0 +1,128 @@
+import random
+from array import array
+
+
+# Bảng khóa Zobrist: mỗi cặp (màu, ô) có một số ngẫu nhiên 64 bit cho việc
+# "ô bị màu chiếm" và một số khác cho việc "đầu luồng của màu nằm ở ô".
+# Khóa của trạng thái là XOR các số tương ứng nên có thể cập nhật O(1) mỗi bước.
+class ZobristHasher:
+    def __init__(self, colors, ROWS, COLS, seed=2024):
+        rng = random.Random(seed)
+        self.COLS = COLS
+        self.color_index = {color: k for k, color in enumerate(colors)}
+        size = ROWS * COLS
+        self.cell_keys = [
+            [rng.getrandbits(64) for _ in range(size)] for _ in colors
+        ]
+        self.head_keys = [
+            [rng.getrandbits(64) for _ in range(size)] for _ in colors
+        ]
+
+    def index(self, pos):
+        return pos[0] * self.COLS + pos[1]
+
+    # Tính khóa đầy đủ từ ma trận và vị trí đầu luồng (chỉ dùng cho node gốc)
+    def hash_state(self, matrix, flows):
+        key = 0
+        for r, row in enumerate(matrix):
+            for c, cell in enumerate(row):
+                if cell is not None:
+                    key ^= self.cell_keys[self.color_index[cell]][r * self.COLS + c]
+        for color, pos in flows.items():
+            key ^= self.head_keys[self.color_index[color]][self.index(pos)]
+        return key
+
+    # Cập nhật khóa khi luồng thứ k đi từ ô old_idx sang ô new_idx.
+    # fill=False khi ô mới đã mang sẵn màu đó (ví dụ ô đích được đánh dấu trước).
+    def move(self, key, k, old_idx, new_idx, fill=True):
+        key ^= self.head_keys[k][old_idx] ^ self.head_keys[k][new_idx]
+        if fill:
+            key ^= self.cell_keys[k][new_idx]
+        return key
+
+
+replacement_policies = ("always", "depth")  # Chính sách thay thế khi bảng đầy
+
+
+# Bảng chuyển vị gọn: địa chỉ mở, dò tuyến tính trên hai mảng kiểu array
+# (khóa 64 bit và chi phí), 16 byte mỗi ô thay vì một chuỗi mã hóa dài O(R*C).
+# capacity=None: bảng tự mở rộng; capacity cố định: thay thế trong cửa sổ
+# dò probes ô theo chính sách "always" (ghi đè ô gốc) hoặc "depth"
+# (ghi đè mục có chi phí nhỏ nhất, giữ lại các trạng thái sâu hơn).
+class TranspositionTable:
+    def __init__(self, capacity=None, replace="always", probes=4):
+        if replace not in replacement_policies:
+            raise ValueError(f"Unknown replacement policy: {replace!r}")
+        self.fixed = capacity is not None
+        self.replace = replace
+        self.probes = probes
+        self.count = 0
+        self.evictions = 0
+        slots = 1 << 12
+        if self.fixed:
+            slots = 1
+            while slots < max(capacity, probes):
+                slots <<= 1
+        self.allocate(slots)
+
+    def allocate(self, slots):
+        self.keys = array("Q", bytes(8 * slots))  # 0 nghĩa là ô trống
+        self.costs = array("q", bytes(8 * slots))
+        self.mask = slots - 1
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    # Lấy chi phí đã lưu của trạng thái, None nếu chưa có
+    def get(self, key):
+        key = key or 1
+        keys = self.keys
+        i = key & self.mask
+        limit = self.probes if self.fixed else len(keys)
+        for _ in range(limit):
+            k = keys[i]
+            if k == key:
+                return self.costs[i]
+            if k == 0:
+                return None
+            i = (i + 1) & self.mask
+        return None
+
+    # Lưu (hoặc cập nhật) chi phí của trạng thái
+    def store(self, key, cost):
+        key = key or 1
+        if not self.fixed and (self.count + 1) * 2 > len(self.keys):
+            self.grow()
+        keys = self.keys
+        home = i = key & self.mask
+        limit = self.probes if self.fixed else len(keys)
+        victim = home
+        for _ in range(limit):
+            k = keys[i]
+            if k == key or k == 0:
+                if k == 0:
+                    self.count += 1
+                keys[i] = key
+                self.costs[i] = cost
+                return
+            if self.costs[i] < self.costs[victim]:
+                victim = i
+            i = (i + 1) & self.mask
+        # Cửa sổ dò đã đầy: thay thế theo chính sách đã chọn
+        if self.replace == "always":
+            victim = home
+        self.evictions += 1
+        keys[victim] = key
+        self.costs[victim] = cost
+
+    # Nhân đôi kích thước bảng và chèn lại các mục
+    def grow(self):
+        old_keys, old_costs = self.keys, self.costs
+        self.allocate(len(old_keys) * 2)
+        self.count = 0
+        for k, cost in zip(old_keys, old_costs):
+            if k:
+                self.store(k, cost)
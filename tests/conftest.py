@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Đặt thư mục gốc của dự án vào sys.path để import được cli, map_data và gói
+# solvers khi chạy pytest từ bất kỳ thư mục nào
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
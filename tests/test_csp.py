@@ -0,0 +1,28 @@
+from solvers.csp_solver import NogoodStore
+
+
+def test_nogood_store_evicts_oldest_beyond_capacity():
+    store = NogoodStore(capacity=2)
+    store.add((("A", 1), ("B", 2)))
+    store.add((("A", 3), ("B", 2)))
+    store.add((("A", 1), ("C", 4)))
+    assert len(store) == 2
+    # Nogood đầu tiên đã bị loại, nogood thứ hai vẫn còn dưới cùng khóa
+    assert store.match("B", 2, {"A": 1}) is None
+    assert store.match("B", 2, {"A": 3}) == (("A", 3),)
+    assert store.match("C", 4, {"A": 1}) == (("A", 1),)
+
+
+def test_nogood_store_drops_empty_buckets():
+    store = NogoodStore(capacity=1)
+    store.add((("A", 1), ("B", 2)))
+    store.add((("A", 1), ("C", 4)))
+    assert ("B", 2) not in store.watch
+    assert len(store) == 1
+
+
+def test_nogood_match_requires_every_assignment():
+    store = NogoodStore()
+    store.add((("A", 1), ("B", 2), ("C", 3)))
+    assert store.match("C", 3, {"A": 1}) is None
+    assert store.match("C", 3, {"A": 1, "B": 2}) == (("A", 1), ("B", 2))
@@ -0,0 +1,30 @@
+from solvers.external_bfs import StateCodec, drop_duplicates, edge_format
+
+# Lưới 1x2 một màu: phần trạng thái dài 4 byte (2 ô + 1 đầu luồng)
+codec = StateCodec({"A": ((0, 0), (0, 1))}, 1, 2)
+
+
+def record(state, parent=0):
+    return state + edge_format.pack(parent, 0, 0)
+
+
+def test_drop_duplicates_within_level_and_against_previous_levels():
+    records = [
+        record(b"\x01\x00\x00\x00", 0),
+        record(b"\x01\x00\x00\x00", 1),  # Trùng bản ghi ngay trước
+        record(b"\x01\x01\x00\x00"),  # Đã có ở tầng trước
+        record(b"\x01\x01\x01\x00"),
+        record(b"\x02\x00\x00\x00"),  # Đã có ở tầng trước nữa
+    ]
+    previous_levels = [
+        record(b"\x00\x00\x00\x00") + record(b"\x01\x01\x00\x00"),
+        b"",
+        record(b"\x02\x00\x00\x00"),
+    ]
+    kept = list(drop_duplicates(records, previous_levels, codec))
+    assert kept == [records[0], records[3]]
+
+
+def test_drop_duplicates_without_previous_levels():
+    records = [record(b"\x01\x00\x00\x00"), record(b"\x02\x00\x00\x00")]
+    assert list(drop_duplicates(records, [], codec)) == records
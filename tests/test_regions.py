@@ -0,0 +1,67 @@
+from solvers.regions import analyze_regions, find_forced_move, is_dead_state
+
+
+# Lưới từ các chuỗi ký tự, "." là ô trống
+def grid(rows):
+    return [[None if ch == "." else ch for ch in row] for row in rows]
+
+
+def test_open_board_is_alive():
+    matrix = grid(["AAA", "B.B", "..."])
+    flows = {"A": (0, 2), "B": (1, 0)}
+    goals = {"A": (0, 2), "B": (1, 2)}
+    assert analyze_regions(matrix, flows, goals, 3, 3) == (
+        {"A": True, "B": True},
+        False,
+        False,
+    )
+    assert not is_dead_state(matrix, flows, goals, 3, 3)
+
+
+def test_enclosed_cell_is_dead_end_and_stranded():
+    matrix = grid([".AB", "AA.", "..B"])
+    flows = {"A": (0, 1), "B": (0, 2)}
+    goals = {"A": (0, 1), "B": (2, 2)}
+    _, stranded, dead_cell = analyze_regions(matrix, flows, goals, 3, 3)
+    assert stranded and dead_cell
+
+
+def test_region_without_flow_is_stranded():
+    # Vùng 2x2 ở góc không có ô kề luồng nào nhưng không có ô ngõ cụt
+    matrix = grid(["..AA", "..AB", "AAAB", "BBBB"])
+    flows = {"A": (0, 3), "B": (3, 0)}
+    goals = {"A": (0, 3), "B": (3, 0)}
+    reachable, stranded, dead_cell = analyze_regions(matrix, flows, goals, 4, 4)
+    assert stranded and not dead_cell
+    assert all(reachable.values())
+    assert is_dead_state(matrix, flows, goals, 4, 4)
+
+
+def test_cut_off_flow_is_unreachable():
+    matrix = grid(["B.A", "AAA", "..B"])
+    flows = {"A": (1, 2), "B": (0, 0)}
+    goals = {"A": (1, 2), "B": (2, 2)}
+    reachable, _, _ = analyze_regions(matrix, flows, goals, 3, 3)
+    assert reachable == {"A": True, "B": False}
+
+
+def test_forced_move_single_legal_direction():
+    matrix = grid(["A.B", "B.A"])
+    flows = {"A": (0, 0), "B": (0, 2)}
+    goals = {"A": (1, 2), "B": (1, 0)}
+    assert find_forced_move(matrix, flows, goals, 2, 3) == ("A", "right")
+
+
+def test_forced_move_into_corridor_cell():
+    # Ô góc (0, 0) chỉ còn hai ô kề tự do nên chỉ luồng A lấp được
+    matrix = grid([".A.", "...", ".A."])
+    flows = {"A": (0, 1)}
+    goals = {"A": (2, 1)}
+    assert find_forced_move(matrix, flows, goals, 3, 3) == ("A", "left")
+
+
+def test_no_forced_move_on_open_board():
+    matrix = grid(["...", ".A.", "..A"])
+    flows = {"A": (1, 1)}
+    goals = {"A": (2, 2)}
+    assert find_forced_move(matrix, flows, goals, 3, 3) is None
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from map_data import maps
+from solvers.sa_solver import PathState, astar_partial, initial_assignment, operators
+
+
+# Cost tính lại từ đầu: mỗi lần đi trùng một ô và mỗi ô trống tính 1
+def recompute_cost(paths, ROWS, COLS):
+    counts = [[0] * COLS for _ in range(ROWS)]
+    for path in paths.values():
+        for r, c in path:
+            counts[r][c] += 1
+    return sum(count - 1 if count else 1 for row in counts for count in row)
+
+
+@pytest.mark.parametrize("fill", [0.2, 0.5, 0.9])
+@pytest.mark.parametrize("size", ["5", "6", "7"])
+def test_astar_partial_places_fill_share_of_moves(size, fill):
+    start_goals = maps[size][1]
+    ROWS = COLS = int(size)
+    partial = astar_partial(start_goals, ROWS, COLS, fill=fill)
+    placed = sum(len(path) - 1 for path in partial.values())
+    # Một lời giải có đúng ROWS * COLS - số màu nước đi
+    assert placed == int(fill * (ROWS * COLS - len(start_goals)))
+
+
+@pytest.mark.parametrize("warm_start", ["random", "greedy"])
+@pytest.mark.parametrize("name", sorted(operators))
+def test_incremental_cost_matches_recompute(name, warm_start):
+    start_goals = maps["7"][1]
+    ROWS = COLS = 7
+    rng = random.Random(0)
+    assignment = initial_assignment(start_goals, ROWS, COLS, warm_start, rng)
+    state = PathState(assignment, ROWS, COLS)
+    assert state.cost == recompute_cost(state.paths, ROWS, COLS)
+    for _ in range(300):
+        color, new_path = operators[name](state, start_goals, ROWS, COLS, rng)
+        if new_path is None:
+            continue
+        before = state.cost
+        old_path, delta = state.replace(color, new_path)
+        assert state.cost == before + delta
+        assert state.cost == recompute_cost(state.paths, ROWS, COLS)
+        if rng.random() < 0.5:  # Từ chối: hoàn tác như SA
+            state.replace(color, old_path)
+            assert state.cost == before
+    assert state.cost == recompute_cost(state.paths, ROWS, COLS)
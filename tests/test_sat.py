@@ -0,0 +1,114 @@
+import os
+import sys
+from itertools import combinations, product
+
+import pytest
+
+from solvers.cdcl import CDCLSolver
+from solvers.sat_solver import run_external, solve_sat
+
+
+def satisfies(model, clauses):
+    return all(
+        any(model[abs(lit)] == (lit > 0) for lit in clause) for clause in clauses
+    )
+
+
+# Nguyên lý chuồng bồ câu: n + 1 con bồ câu vào n chuồng (vô nghiệm)
+def pigeonhole(n):
+    def var(p, h):
+        return p * n + h + 1
+
+    clauses = [[var(p, h) for h in range(n)] for p in range(n + 1)]
+    for h in range(n):
+        for p, q in combinations(range(n + 1), 2):
+            clauses.append([-var(p, h), -var(q, h)])
+    return n * (n + 1), clauses
+
+
+def test_cdcl_satisfiable():
+    clauses = [[1, 2], [-1, 2], [1, -2], [-2, 3, -4], [4, -3]]
+    solver = CDCLSolver(4, clauses)
+    assert solver.solve()
+    assert satisfies(solver.model, clauses)
+
+
+def test_cdcl_unsatisfiable():
+    clauses = [[a, b] for a, b in product((1, -1), (2, -2))]
+    assert CDCLSolver(2, clauses).solve() is False
+
+
+def test_cdcl_pigeonhole_needs_learning():
+    num_vars, clauses = pigeonhole(4)
+    solver = CDCLSolver(num_vars, clauses)
+    assert solver.solve() is False
+    assert solver.conflicts > 0
+
+
+def test_cdcl_incremental_clause():
+    solver = CDCLSolver(2, [[1, 2]])
+    assert solver.solve()
+    solver.add_clause([-1])
+    assert solver.solve() and solver.model[2]
+    solver.add_clause([-2])
+    assert solver.solve() is False
+
+
+def test_acyclic_encoding_solves_in_one_round():
+    # Lưới thưa: bảng mã không chặn chu trình sinh nhiều chu trình tách rời
+    start_goals = {"A": ((0, 0), (0, 1)), "B": ((7, 7), (7, 6))}
+    stats = {}
+    moves = solve_sat(start_goals, 8, 8, backend="builtin", stats=stats)[0]
+    assert moves and stats["rounds"] == 1
+
+    stats = {}
+    solve_sat(start_goals, 8, 8, backend="builtin", acyclic=False, stats=stats)
+    assert stats["rounds"] > 1
+
+
+# Bộ giải ngoài giả: một script Python đặt tên như bộ giải thật
+def fake_solver(tmp_path, name, body):
+    path = tmp_path / name
+    path.write_text(f"#!{sys.executable}\nimport sys\n{body}\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="needs an executable script")
+@pytest.mark.parametrize(
+    "name, body, expected",
+    [
+        (
+            "kissat",
+            "print('s SATISFIABLE\\nv 1 -2 0'); sys.exit(10)",
+            [False, True, False],
+        ),
+        ("kissat", "print('s UNSATISFIABLE'); sys.exit(20)", None),
+        ("kissat", "sys.exit(20)", None),
+        (
+            "minisat",
+            "open(sys.argv[2], 'w').write('SAT\\n1 -2 0\\n'); sys.exit(10)",
+            [False, True, False],
+        ),
+        ("minisat", "open(sys.argv[2], 'w').write('UNSAT\\n'); sys.exit(20)", None),
+    ],
+)
+def test_external_solver_answers(tmp_path, name, body, expected):
+    binary = fake_solver(tmp_path, name, body)
+    assert run_external(binary, str(tmp_path / "flow.cnf"), 2) == expected
+
+
+@pytest.mark.skipif(os.name == "nt", reason="needs an executable script")
+@pytest.mark.parametrize(
+    "name, body",
+    [
+        ("kissat", "sys.exit(1)"),  # Lỗi, không in kết quả
+        ("kissat", "print('garbage')"),  # Kết quả không đọc được
+        ("kissat", "print('s SATISFIABLE'); sys.exit(139)"),  # Mã thoát lỗi
+        ("minisat", "import os; os.kill(os.getpid(), 9)"),  # Bị dừng từ ngoài
+    ],
+)
+def test_external_solver_failure_is_not_unsat(tmp_path, name, body):
+    binary = fake_solver(tmp_path, name, body)
+    with pytest.raises(RuntimeError):
+        run_external(binary, str(tmp_path / "flow.cnf"), 2)
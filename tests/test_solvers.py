@@ -0,0 +1,291 @@
+import json
+import multiprocessing as mp
+import os
+
+import pytest
+
+import cli
+from map_data import maps
+from solvers import parallel_astar
+from solvers.astar_solver import solve_astar
+from solvers.registry import CancelToken, get_solver, registry, run_solver
+
+directions = {
+    "up": (-1, 0),
+    "down": (1, 0),
+    "left": (0, -1),
+    "right": (0, 1),
+}  # Hướng di chuyển trong ma trận
+
+# Mọi thuật toán trong registry cùng các chế độ chính của chúng
+variants = [
+    ("A*", {}),
+    ("A*", {"engine": "bitboard"}),
+    ("A*", {"mode": "ida"}),
+    ("A*", {"mode": "greedy"}),
+    ("A*", {"mode": "weighted"}),
+    ("A*", {"workers": 2}),
+    ("BFS", {}),
+    ("BFS", {"partial_order": True}),
+    ("BFS", {"external": True}),
+    ("BFS", {"workers": 2}),
+    ("CSP", {}),
+    ("CSP", {"engine": "cell"}),
+    ("CSP", {"workers": 2}),
+    ("SA", {"seed": 1}),
+    ("SA", {"seed": 0, "workers": 2}),
+    ("Beam", {}),
+    ("SAT", {"backend": "builtin"}),
+]
+variant_ids = [f"{name}-{options}" for name, options in variants]
+
+# Các thuật toán duyệt đầy đủ: bài toán vô nghiệm phải trả về "unsolved"
+complete_variants = [(name, options) for name, options in variants if name != "SA"]
+
+bundled_maps = [("5", 1), ("5", 2), ("6", 1)]
+
+# Hai luồng buộc phải cắt nhau: vô nghiệm
+unsolvable = {"A": ((0, 0), (2, 2)), "B": ((0, 1), (2, 1))}
+
+# Lưới 16x16 ít màu, không thuật toán nào giải kịp trong vài phần mười giây
+hard = {
+    "R": ((12, 5), (14, 8)),
+    "G": ((13, 8), (2, 11)),
+    "B": ((1, 11), (3, 10)),
+    "Y": ((3, 9), (13, 2)),
+    "O": ((14, 2), (12, 6)),
+}
+
+
+# Phát lại các nước đi và kiểm tra: mỗi luồng chỉ đi vào ô trống hoặc đích của
+# nó, mọi luồng tới đích và lưới được phủ kín
+def assert_valid_solution(start_goals, ROWS, COLS, moves):
+    grid = [[None for _ in range(COLS)] for _ in range(ROWS)]
+    heads = {}
+    for color, (start, goal) in start_goals.items():
+        grid[start[0]][start[1]] = grid[goal[0]][goal[1]] = color
+        heads[color] = start
+    for color, move in moves:
+        r, c = heads[color]
+        dr, dc = directions[move]
+        nr, nc = r + dr, c + dc
+        assert 0 <= nr < ROWS and 0 <= nc < COLS
+        assert heads[color] != start_goals[color][1], f"{color} moved past its goal"
+        assert grid[nr][nc] is None or (nr, nc) == start_goals[color][1]
+        grid[nr][nc] = color
+        heads[color] = (nr, nc)
+    for color, (_, goal) in start_goals.items():
+        assert heads[color] == goal, f"{color} does not reach its goal"
+    assert all(cell is not None for row in grid for cell in row)
+
+
+def test_every_algorithm_is_covered():
+    assert {name for name, _ in variants} == set(registry)
+
+
+@pytest.mark.parametrize("size, number", bundled_maps)
+@pytest.mark.parametrize("name, options", variants, ids=variant_ids)
+def test_solves_bundled_maps(name, options, size, number):
+    start_goals = maps[size][number]
+    ROWS = COLS = int(size)
+    result = run_solver(name, start_goals, ROWS, COLS, timeout=60, **options)
+    assert result.status == "solved"
+    assert_valid_solution(start_goals, ROWS, COLS, result.moves)
+
+
+@pytest.mark.parametrize("propagate", [True, False])
+@pytest.mark.parametrize("mode", ["astar", "weighted", "greedy", "ida"])
+def test_bitboard_engine_matches_matrix(mode, propagate):
+    for size, numbered in maps.items():
+        for number, start_goals in numbered.items():
+            ROWS = COLS = int(size)
+            matrix, _, *matrix_counters = solve_astar(
+                start_goals, ROWS, COLS, mode=mode, propagate=propagate
+            )
+            bitboard, _, *bitboard_counters = solve_astar(
+                start_goals,
+                ROWS,
+                COLS,
+                engine="bitboard",
+                mode=mode,
+                propagate=propagate,
+            )
+            assert bitboard == matrix, (size, number)
+            assert bitboard_counters == matrix_counters, (size, number)
+
+
+@pytest.mark.parametrize("name, options", complete_variants)
+def test_unsolvable_board(name, options):
+    result = run_solver(name, unsolvable, 3, 3, timeout=60, **options)
+    assert result.moves is None
+    assert result.status == "unsolved"
+
+
+def test_sa_unsolvable_board_is_incomplete():
+    result = run_solver("SA", unsolvable, 3, 3, max_reheats=1, iter_per_temp=50)
+    assert result.moves is None
+    assert result.status == "incomplete"
+
+
+def test_sa_step_limit_is_incomplete():
+    stats = {}
+    result = run_solver("SA", unsolvable, 3, 3, max_steps=2000, stats=stats)
+    assert result.status == "incomplete"
+    assert stats["reheats"] == 0
+
+
+def test_node_limit_is_incomplete():
+    result = run_solver("BFS", maps["7"][3], 7, 7, max_nodes=5)
+    assert result.status == "incomplete"
+    assert result.stats["exhausted"]
+
+
+@pytest.mark.parametrize("name, options", variants, ids=variant_ids)
+def test_timeout_stops_search(name, options):
+    result = run_solver(name, hard, 16, 16, timeout=0.3, **options)
+    assert result.status == "timeout"
+    assert result.elapsed < 2.0
+
+
+@pytest.mark.parametrize("name, options", variants, ids=variant_ids)
+def test_cancelled_before_start(name, options):
+    token = CancelToken()
+    token.cancel()
+    result = run_solver(name, hard, 16, 16, cancel=token, **options)
+    assert result.status == "cancelled"
+    assert result.elapsed < 2.0
+
+
+# Worker HDA* chết ngay khi khởi động
+def crashing_worker(*args):
+    os._exit(3)
+
+
+@pytest.mark.skipif(mp.get_start_method() != "fork", reason="patches the worker")
+def test_parallel_astar_worker_crash_is_not_unsolved(monkeypatch):
+    monkeypatch.setattr(parallel_astar, "hda_worker", crashing_worker)
+    with pytest.raises(RuntimeError):
+        parallel_astar.solve_parallel_astar(
+            maps["5"][1], 5, 5, workers=2, propagate=False
+        )
+
+
+def test_cancel_token():
+    token = CancelToken(timeout=0)
+    assert token.is_set() and token.expired() and not token.cancelled
+    parent = CancelToken()
+    child = CancelToken(parent=parent)
+    assert not child.is_set()
+    parent.cancel()
+    assert child.is_set()
+
+
+def test_unknown_algorithm():
+    with pytest.raises(ValueError):
+        get_solver("DFS")
+
+
+def test_cell_csp_rejects_workers():
+    with pytest.raises(ValueError):
+        run_solver("CSP", maps["5"][1], 5, 5, engine="cell", workers=2)
+
+
+@pytest.mark.parametrize(
+    "size, number, options", [("6", 1, {}), ("5", 1, {"propagate": False})]
+)
+def test_parallel_bfs_matches_serial(size, number, options):
+    start_goals = maps[size][number]
+    ROWS = COLS = int(size)
+    serial = run_solver("BFS", start_goals, ROWS, COLS, **options)
+    # min_parallel=1: mọi tầng đều được chia cho các worker
+    parallel = run_solver(
+        "BFS", start_goals, ROWS, COLS, workers=2, min_parallel=1, **options
+    )
+    assert serial.status == parallel.status == "solved"
+    assert parallel.moves == serial.moves
+    assert parallel.nodes_generated == serial.nodes_generated
+    assert parallel.nodes_expanded == serial.nodes_expanded
+
+
+def test_csp_stats_in_result():
+    for options in ({}, {"engine": "cell"}, {"workers": 2}):
+        result = run_solver("CSP", maps["5"][1], 5, 5, **options)
+        assert {"backjumps", "nogood_hits", "nogoods"} <= set(result.stats)
+
+
+@pytest.mark.parametrize(
+    "argv, status",
+    [
+        (["--size", "5", "--map", "1"], "solved"),
+        (
+            ["--size", "7", "--map", "3", "--algorithm", "BFS", "-o", "max_nodes=5"],
+            "incomplete",
+        ),
+    ],
+)
+def test_cli_json(capsys, argv, status):
+    code = cli.main(argv + ["--json"])
+    output = json.loads(capsys.readouterr().out)
+    assert output["status"] == status
+    assert code == (0 if status == "solved" else 1)
+
+
+def test_cli_puzzle_file(tmp_path, capsys):
+    puzzle = tmp_path / "puzzle.txt"
+    puzzle.write_text("R.R\nG.G\n")
+    assert cli.main(["--puzzle", str(puzzle), "--json"]) == 0
+    output = json.loads(capsys.readouterr().out)
+    start_goals, ROWS, COLS = cli.load_puzzle(str(puzzle))
+    assert_valid_solution(start_goals, ROWS, COLS, output["moves"])
+
+
+def test_cli_puzzle_without_colors(tmp_path):
+    puzzle = tmp_path / "puzzle.txt"
+    puzzle.write_text("...\n...\n")
+    with pytest.raises(ValueError, match="at least one color"):
+        cli.load_puzzle(str(puzzle))
+
+
+def test_missing_external_sat_solver_is_error(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path))
+    result = run_solver("SAT", maps["5"][1], 5, 5, backend="external")
+    assert result.status == "error" and "No SAT solver" in result.error
+
+
+def test_cli_json_failing_external_sat_solver(tmp_path, monkeypatch, capsys):
+    kissat = tmp_path / "kissat"
+    kissat.write_text("#!/bin/sh\nexit 1\n")
+    kissat.chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path))
+    argv = ["--size", "5", "--map", "1", "--algorithm", "SAT"]
+    code = cli.main(argv + ["-o", "backend=external", "--json"])
+    output = json.loads(capsys.readouterr().out)
+    assert code == 1
+    assert output["status"] == "error" and "exit code 1" in output["error"]
+
+
+def test_cli_bad_option_is_usage_error(capsys):
+    with pytest.raises(SystemExit):
+        cli.main(["--size", "5", "--map", "1", "-o", "rounds=3", "--algorithm", "SA"])
+    assert "rounds" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"workers": 2, "max_reheats": 1},
+        {"workers": 2, "schedule": "adaptive"},  # Kể cả giá trị mặc định
+        {"rounds": 3},
+    ],
+)
+def test_sa_rejects_options_of_the_other_mode(options):
+    with pytest.raises(ValueError):
+        run_solver("SA", maps["5"][1], 5, 5, **options)
+
+
+def test_parallel_sa_forwards_rounds_and_chains():
+    stats = {}
+    options = {"workers": 2, "rounds": 1, "chains": 2, "iter_per_temp": 50}
+    result = run_solver("SA", unsolvable, 3, 3, stats=stats, **options)
+    assert result.status == "incomplete"
+    assert stats["rounds"] == 1 and stats["attempts"] == 1
@@ -0,0 +1,60 @@
+import pytest
+
+from solvers.zobrist import TranspositionTable, ZobristHasher
+
+
+# Bảng cố định 4 ô, dò cả 4 ô: khóa 4..7 lấp đầy bảng (ô gốc 0..3), khóa 8 có
+# ô gốc 0 nên phải thay thế một mục
+def full_table(replace):
+    table = TranspositionTable(capacity=4, replace=replace)
+    for key, cost in ((4, 10), (5, 1), (6, 10), (7, 10)):
+        table.store(key, cost)
+    table.store(8, 5)
+    return table
+
+
+def test_always_replaces_home_slot():
+    table = full_table("always")
+    assert table.evictions == 1
+    assert len(table) == 4
+    assert table.get(8) == 5
+    assert 4 not in table
+    assert all(key in table for key in (5, 6, 7))
+
+
+def test_depth_replaces_cheapest_entry():
+    table = full_table("depth")
+    assert table.evictions == 1
+    assert table.get(8) == 5
+    assert 5 not in table
+    assert all(key in table for key in (4, 6, 7))
+
+
+def test_growing_table_keeps_every_key():
+    table = TranspositionTable()
+    for key in range(1, 20000):
+        table.store(key * 7919, key)
+    assert len(table) == 19999
+    assert table.evictions == 0
+    assert all(table.get(key * 7919) == key for key in range(1, 20000))
+
+
+def test_store_updates_existing_key():
+    table = TranspositionTable(capacity=4)
+    table.store(3, 1)
+    table.store(3, 2)
+    assert len(table) == 1
+    assert table.get(3) == 2
+
+
+def test_unknown_replacement_policy():
+    with pytest.raises(ValueError):
+        TranspositionTable(capacity=4, replace="random")
+
+
+def test_incremental_key_matches_full_hash():
+    hasher = ZobristHasher(["A"], 1, 3)
+    matrix = [["A", None, "A"]]
+    key = hasher.hash_state(matrix, {"A": (0, 0)})
+    key = hasher.move(key, 0, hasher.index((0, 0)), hasher.index((0, 1)))
+    assert key == hasher.hash_state([["A", "A", "A"]], {"A": (0, 1)})